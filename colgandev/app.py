@@ -11,12 +11,20 @@ from colgandev.html.html_components import (
     H2,
     A,
     Button,
+    Component,
     Div,
     Li,
     P,
     Ul,
+    freeze,
     render,
+    render_stream,
+    trusted,
 )
+from colgandev.html.lazy import lazy_router
+from colgandev.html.metrics import instrument
+from colgandev.html.page_cache import cached_page, compile_pages, precompile
+from colgandev.html.static import Static
 
 logger = logging.getLogger("main")
 
@@ -25,6 +33,7 @@ logger = logging.getLogger("main")
 async def lifespan(app: FastAPI):
     # Start the background task without awaiting it
     asyncio.create_task(run_refresh_script())
+    compile_pages()
 
     yield
 
@@ -45,204 +54,222 @@ async def run_refresh_script():
 
 
 app = FastAPI(lifespan=lifespan)
+app.include_router(lazy_router)
+instrument(app)
 
 
-@app.get("/")
-async def root(request: Request):
-    return render(
-        Layout(
-            page_title="Colgan Development - Home",
-            description="David Colgan's development environment, tools, and configuration",
-        )(
-            Container()(
-                Row()(
-                    Col(size="12")(
-                        H1(class_="display-4 mb-4")("🚀 Colgan Development"),
-                        Alert(variant="info")(
-                            "Welcome to my development environment! This is built with FastAPI and custom HTML components."
-                        ),
-                    )
-                ),
-                Row()(
-                    Col(size="md-6")(
-                        Card()(
-                            CardHeader()(H2(class_="h5 mb-0")("🛠️ Development Tools")),
-                            CardBody()(
-                                P()("Here are some of the tools and technologies I use:"),
-                                Ul(class_="list-unstyled")(
-                                    Li(class_="mb-2")(
-                                        Badge(variant="primary")("Python 3.13"), " Modern Python with type hints"
-                                    ),
-                                    Li(class_="mb-2")(
-                                        Badge(variant="success")("FastAPI"), " High-performance web framework"
-                                    ),
-                                    Li(class_="mb-2")(
-                                        Badge(variant="info")("Pydantic"), " Data validation with type safety"
-                                    ),
-                                    Li(class_="mb-2")(
-                                        Badge(variant="warning")("Bootstrap 5.3"), " Modern CSS framework"
-                                    ),
-                                ),
-                            ),
-                        )
+home_content = freeze(
+    Static()(
+        Container()(
+            Row()(
+                Col(size="12")(
+                    H1(class_="display-4 mb-4")("🚀 Colgan Development"),
+                    Alert(variant="info")(
+                        "Welcome to my development environment! This is built with FastAPI and custom HTML components."
                     ),
-                    Col(size="md-6")(
-                        Card()(
-                            CardHeader()(H2(class_="h5 mb-0")("📁 Quick Links")),
-                            CardBody()(
-                                P()("Explore different parts of my setup:"),
-                                Div(class_="d-grid gap-2")(
-                                    A(href="/~/repos/colgandev", class_="btn btn-outline-primary")(
-                                        "📂 Dotfiles & Config"
-                                    ),
-                                    Button(type="button", class_="btn btn-outline-secondary", disabled=True)(
-                                        "🔧 Tools (Coming Soon)"
-                                    ),
-                                    Button(type="button", class_="btn btn-outline-secondary", disabled=True)(
-                                        "📊 Dashboard (Coming Soon)"
-                                    ),
+                )
+            ),
+            Row()(
+                Col(size="md-6")(
+                    Card()(
+                        CardHeader()(H2(class_="h5 mb-0")("🛠️ Development Tools")),
+                        CardBody()(
+                            P()("Here are some of the tools and technologies I use:"),
+                            Ul(class_="list-unstyled")(
+                                Li(class_="mb-2")(
+                                    Badge(variant="primary")("Python 3.13"), " Modern Python with type hints"
                                 ),
+                                Li(class_="mb-2")(
+                                    Badge(variant="success")("FastAPI"), " High-performance web framework"
+                                ),
+                                Li(class_="mb-2")(
+                                    Badge(variant="info")("Pydantic"), " Data validation with type safety"
+                                ),
+                                Li(class_="mb-2")(Badge(variant="warning")("Bootstrap 5.3"), " Modern CSS framework"),
                             ),
-                        )
-                    ),
+                        ),
+                    )
                 ),
-                Row()(
-                    Col(size="12")(
-                        Card(class_="mt-4")(
-                            CardHeader()(H2(class_="h5 mb-0")("💡 About This System")),
-                            CardBody()(
-                                P()(
-                                    "This website is built using a custom HTML component system that provides "
-                                    "type-safe templating directly in Python. No separate template files needed!"
-                                ),
-                                P()(
-                                    "The components are built with Pydantic for validation and use a fluent API "
-                                    "that formats beautifully with Black. It's like JSX but for Python!"
+                Col(size="md-6")(
+                    Card()(
+                        CardHeader()(H2(class_="h5 mb-0")("📁 Quick Links")),
+                        CardBody()(
+                            P()("Explore different parts of my setup:"),
+                            Div(class_="d-grid gap-2")(
+                                A(href="/~/repos/colgandev", class_="btn btn-outline-primary")("📂 Dotfiles & Config"),
+                                Button(type="button", class_="btn btn-outline-secondary", disabled=True)(
+                                    "🔧 Tools (Coming Soon)"
                                 ),
-                                Alert(variant="success")(
-                                    "🎯 Type-safe • 🔧 Composable • 🎨 Beautiful syntax • ⚡ Fast development"
+                                Button(type="button", class_="btn btn-outline-secondary", disabled=True)(
+                                    "📊 Dashboard (Coming Soon)"
                                 ),
                             ),
-                        )
+                        ),
                     )
                 ),
-            )
+            ),
+            Row()(
+                Col(size="12")(
+                    Card(class_="mt-4")(
+                        CardHeader()(H2(class_="h5 mb-0")("💡 About This System")),
+                        CardBody()(
+                            P()(
+                                "This website is built using a custom HTML component system that provides "
+                                "type-safe templating directly in Python. No separate template files needed!"
+                            ),
+                            P()(
+                                "The components are built with Pydantic for validation and use a fluent API "
+                                "that formats beautifully with Black. It's like JSX but for Python!"
+                            ),
+                            Alert(variant="success")(
+                                "🎯 Type-safe • 🔧 Composable • 🎨 Beautiful syntax • ⚡ Fast development"
+                            ),
+                        ),
+                    )
+                )
+            ),
         )
     )
+)
 
 
-@app.get("/~/repos/colgandev")
-async def dotfiles():
-    """
-    These are my dotfiles. Feel free to use them!
-    """
-    return render(
-        Layout(
-            page_title="Dotfiles & Configuration - Colgan Development",
-            description="David Colgan's dotfiles and development setup",
-        )(
-            Container()(
-                Row()(
-                    Col(size="12")(
-                        H1(class_="display-5 mb-4")("📂 Dotfiles & Configuration"),
-                        Alert(variant="info")(
-                            "These are my dotfiles and development configuration. Feel free to use them!"
+@precompile("/")
+@trusted()
+def home_page() -> Component:
+    return Layout(
+        page_title="Colgan Development - Home",
+        description="David Colgan's development environment, tools, and configuration",
+    )(home_content)
+
+
+@app.get("/")
+@cached_page()
+async def root(request: Request):
+    return render_stream(home_page())
+
+
+dotfiles_content = freeze(
+    Static()(
+        Container()(
+            Row()(
+                Col(size="12")(
+                    H1(class_="display-5 mb-4")("📂 Dotfiles & Configuration"),
+                    Alert(variant="info")(
+                        "These are my dotfiles and development configuration. Feel free to use them!"
+                    ),
+                )
+            ),
+            Row()(
+                Col(size="md-8")(
+                    Card()(
+                        CardHeader()(H2(class_="h5 mb-0")("🛠️ What's Included")),
+                        CardBody()(
+                            P()("This repository contains my complete development environment setup:"),
+                            Ul()(
+                                Li()("Neovim configuration with modern plugins"),
+                                Li()("Alacritty terminal configuration"),
+                                Li()("Git configuration and aliases"),
+                                Li()("Bash configuration and prompt"),
+                                Li()("Window manager and desktop settings"),
+                                Li()("Development scripts and utilities"),
+                            ),
+                            P()(
+                                "Everything is designed to work together as a cohesive development environment "
+                                "optimized for Python, web development, and system administration."
+                            ),
                         ),
                     )
                 ),
-                Row()(
-                    Col(size="md-8")(
-                        Card()(
-                            CardHeader()(H2(class_="h5 mb-0")("🛠️ What's Included")),
-                            CardBody()(
-                                P()("This repository contains my complete development environment setup:"),
-                                Ul()(
-                                    Li()("Neovim configuration with modern plugins"),
-                                    Li()("Alacritty terminal configuration"),
-                                    Li()("Git configuration and aliases"),
-                                    Li()("Bash configuration and prompt"),
-                                    Li()("Window manager and desktop settings"),
-                                    Li()("Development scripts and utilities"),
-                                ),
-                                P()(
-                                    "Everything is designed to work together as a cohesive development environment "
-                                    "optimized for Python, web development, and system administration."
-                                ),
-                            ),
-                        )
-                    ),
-                    Col(size="md-4")(
-                        Card()(
-                            CardHeader()(
-                                H2(class_="h5 mb-0")(
-                                    "🚀 Quick Setup",
-                                ),
+                Col(size="md-4")(
+                    Card()(
+                        CardHeader()(
+                            H2(class_="h5 mb-0")(
+                                "🚀 Quick Setup",
                             ),
-                            CardBody()(
-                                P()("To install these dotfiles:"),
-                                Div(class_="bg-dark text-light p-3 rounded")(
-                                    "git clone https://github.com/dvcolgan/colgandev.git",
-                                    Div()(
-                                        "cd colgandev",
-                                    ),
-                                    Div()(
-                                        "just sync_dotfiles",
-                                    ),
+                        ),
+                        CardBody()(
+                            P()("To install these dotfiles:"),
+                            Div(class_="bg-dark text-light p-3 rounded")(
+                                "git clone https://github.com/dvcolgan/colgandev.git",
+                                Div()(
+                                    "cd colgandev",
                                 ),
-                                P(class_="mt-3 small text-muted")(
-                                    "This will create symlinks to install all configuration files."
+                                Div()(
+                                    "just sync_dotfiles",
                                 ),
                             ),
-                        )
-                    ),
-                ),
-                Row()(
-                    Col(size="12")(
-                        Card(class_="mt-4")(
-                            CardHeader()(
-                                H2(class_="h5 mb-0")("📋 Available Commands"),
+                            P(class_="mt-3 small text-muted")(
+                                "This will create symlinks to install all configuration files."
                             ),
-                            CardBody()(
-                                P()("Use these justfile commands to manage the environment:"),
-                                Div(class_="row")(
-                                    Div(class_="col-md-6")(
-                                        Ul(class_="list-unstyled")(
-                                            Li(class_="mb-2")(
-                                                Badge(variant="primary")("sync_dotfiles"), " Install all dotfiles"
-                                            ),
-                                            Li(class_="mb-2")(
-                                                Badge(variant="success")("serve"), " Start development server"
-                                            ),
-                                            Li(class_="mb-2")(
-                                                Badge(variant="info")("lint"),
-                                                " Format and lint code",
-                                            ),
+                        ),
+                    )
+                ),
+            ),
+            Row()(
+                Col(size="12")(
+                    Card(class_="mt-4")(
+                        CardHeader()(
+                            H2(class_="h5 mb-0")("📋 Available Commands"),
+                        ),
+                        CardBody()(
+                            P()("Use these justfile commands to manage the environment:"),
+                            Div(class_="row")(
+                                Div(class_="col-md-6")(
+                                    Ul(class_="list-unstyled")(
+                                        Li(class_="mb-2")(
+                                            Badge(variant="primary")("sync_dotfiles"), " Install all dotfiles"
+                                        ),
+                                        Li(class_="mb-2")(
+                                            Badge(variant="success")("serve"), " Start development server"
+                                        ),
+                                        Li(class_="mb-2")(
+                                            Badge(variant="info")("lint"),
+                                            " Format and lint code",
                                         ),
                                     ),
-                                    Div(class_="col-md-6")(
-                                        Ul(class_="list-unstyled")(
-                                            Li(class_="mb-2")(
-                                                Badge(variant="warning")("test"),
-                                                " Run test suite",
-                                            ),
-                                            Li(class_="mb-2")(
-                                                Badge(variant="secondary")("upgrade"),
-                                                " Update Neovim",
-                                            ),
-                                            Li(class_="mb-2")(
-                                                Badge(variant="dark")("backup_home"),
-                                                " Backup important folders",
-                                            ),
+                                ),
+                                Div(class_="col-md-6")(
+                                    Ul(class_="list-unstyled")(
+                                        Li(class_="mb-2")(
+                                            Badge(variant="warning")("test"),
+                                            " Run test suite",
+                                        ),
+                                        Li(class_="mb-2")(
+                                            Badge(variant="secondary")("upgrade"),
+                                            " Update Neovim",
+                                        ),
+                                        Li(class_="mb-2")(
+                                            Badge(variant="dark")("backup_home"),
+                                            " Backup important folders",
                                         ),
                                     ),
                                 ),
                             ),
-                        )
+                        ),
                     )
-                ),
-            )
+                )
+            ),
         )
     )
+)
+
+
+@precompile("/~/repos/colgandev")
+@trusted()
+def dotfiles_page() -> Component:
+    return Layout(
+        page_title="Dotfiles & Configuration - Colgan Development",
+        description="David Colgan's dotfiles and development setup",
+    )(dotfiles_content)
+
+
+@app.get("/~/repos/colgandev")
+@cached_page()
+async def dotfiles(request: Request):
+    """
+    These are my dotfiles. Feel free to use them!
+    """
+    return render(dotfiles_page())
 
 
 @app.post("/clipboard")
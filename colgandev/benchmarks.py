@@ -0,0 +1,147 @@
+"""
+Rendering benchmark suite with stored baselines and a regression gate.
+
+Each case is a builder that returns a component tree: the two app pages as
+their routes build them, plus synthetic trees that stress one dimension each (a
+wide table, the same table built from columns with `DataTable`, deep nesting,
+thousands of sibling text nodes). Every case is measured in three stages:
+`construct` (calling the builder), `render` (`render_html`, minified) and
+`format` (`render_html` with pretty output; formatting happens during the tree
+walk, so this is the cost of rendering formatted HTML). A stage reports its
+best time over many short rounds (the minimum filters out scheduler noise
+better than a few long runs) as ops/sec, plus peak bytes allocated by one call
+as measured by tracemalloc in a separate run, so the tracing overhead does not
+skew the timings.
+
+Results are compared against `tests/benchmark_baseline.json`. A stage slower
+than its baseline by more than the threshold is a regression: `cld benchmark`
+exits non-zero and `test_render_benchmarks` fails (that test only runs with
+COLGANDEV_BENCHMARKS=1). Timings depend on the machine, so record the baseline
+with `cld benchmark --update-baseline` on the machine that checks against it.
+Separate processes on a shared machine can differ by more than 50%, so the
+default threshold only flags stages that got twice as slow.
+Trusted construction is forced on for the run so results don't depend on the
+DEBUG setting.
+"""
+
+import json
+import platform
+import timeit
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+from colgandev.app import dotfiles_page, home_page
+from colgandev.html import html_components
+from colgandev.html.data_table import Column, DataTable
+from colgandev.html.html_components import Component, Div, HTMLFormat, P, Table, Tbody, Td, Th, Thead, Tr, trusted
+
+BASELINE_PATH = Path(__file__).resolve().parent.parent / "tests" / "benchmark_baseline.json"
+
+REGRESSION_THRESHOLD = 1.0
+
+type Results = dict[str, dict[str, dict[str, float]]]
+
+
+@trusted()
+def wide_table(rows: int = 500, columns: int = 8) -> Component:
+    return Table(class_="table table-sm")(
+        Thead()(Tr()(*(Th()(f"Column {column}") for column in range(columns)))),
+        Tbody()(*(Tr()(*(Td()(f"{row}:{column}") for column in range(columns))) for row in range(rows))),
+    )
+
+
+def data_table(rows: int = 500, columns: int = 8) -> Component:
+    return DataTable(
+        class_="table table-sm",
+        columns=tuple(
+            Column(f"Column {column}", [f"{row}:{column}" for row in range(rows)]) for column in range(columns)
+        ),
+    )
+
+
+@trusted()
+def deep_nesting(depth: int = 300) -> Component:
+    node = P()("leaf")
+    for level in range(depth):
+        node = Div(class_=f"level-{level % 10}")(node)
+    return node
+
+
+@trusted()
+def many_text_nodes(count: int = 5000) -> Component:
+    return Div()(*(f"text node {index} & more " for index in range(count)))
+
+
+def cases() -> dict[str, Callable[[], Component]]:
+    return {
+        "page /": home_page,
+        "page /~/repos/colgandev": dotfiles_page,
+        "wide table": wide_table,
+        "data table": data_table,
+        "deep nesting": deep_nesting,
+        "many text nodes": many_text_nodes,
+    }
+
+
+def measure(fn: Callable[[], object], rounds: int = 20) -> dict[str, float]:
+    number, _ = timeit.Timer(fn).autorange()
+    number = max(number // 5, 1)
+    seconds = min(timeit.repeat(fn, number=number, repeat=rounds)) / number
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"seconds": round(seconds, 9), "ops_per_sec": round(1 / seconds, 1), "peak_bytes": peak_bytes}
+
+
+def run_benchmarks() -> Results:
+    debug = html_components.DEBUG
+    html_components.DEBUG = False
+    try:
+        results = {}
+        for name, build in cases().items():
+            tree = build()
+            results[name] = {
+                "construct": measure(build),
+                "render": measure(lambda: tree.render_html(HTMLFormat.MINIFIED)),
+                "format": measure(lambda: tree.render_html(HTMLFormat.PRETTY)),
+            }
+        return results
+    finally:
+        html_components.DEBUG = debug
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> Results:
+    return json.loads(path.read_text())["results"] if path.exists() else {}
+
+
+def save_baseline(results: Results, path: Path = BASELINE_PATH):
+    path.write_text(json.dumps({"python": platform.python_version(), "results": results}, indent=2) + "\n")
+
+
+def find_regressions(results: Results, baseline: Results, threshold: float = REGRESSION_THRESHOLD) -> list[str]:
+    regressions = []
+    for name, stages in results.items():
+        for stage, result in stages.items():
+            expected = baseline.get(name, {}).get(stage)
+            if expected and result["seconds"] > expected["seconds"] * (1 + threshold):
+                slowdown = result["seconds"] / expected["seconds"]
+                regressions.append(f"{name} {stage}: {slowdown:.2f}x slower than baseline")
+    return regressions
+
+
+def format_results(results: Results, baseline: Results) -> str:
+    lines = [f"{'case':<26} {'stage':<10} {'ops/sec':>10} {'vs base':>8} {'peak KiB':>9}"]
+    for name, stages in results.items():
+        for stage, result in stages.items():
+            expected = baseline.get(name, {}).get(stage)
+            change = f"{expected['seconds'] / result['seconds']:.2f}x" if expected else "-"
+            lines.append(
+                f"{name:<26} {stage:<10} {result['ops_per_sec']:>10.0f} {change:>8} {result['peak_bytes'] / 1024:>9.1f}"
+            )
+    return "\n".join(lines)
@@ -27,3 +27,23 @@ def serve(host, port):
         reload=True,
     )
     click.echo("done")
+
+
+@cli.command()
+@click.option("--update-baseline", is_flag=True, help="Store these results as the new baseline")
+@click.option("--threshold", default=1.0, help="Allowed slowdown (1.0 = twice as slow) before a stage regresses")
+def benchmark(update_baseline, threshold):
+    from colgandev.benchmarks import find_regressions, format_results, load_baseline, run_benchmarks, save_baseline
+
+    results = run_benchmarks()
+    baseline = load_baseline()
+    click.echo(format_results(results, baseline))
+
+    if update_baseline:
+        save_baseline(results)
+        click.echo("Baseline updated")
+        return
+
+    if regressions := find_regressions(results, baseline, threshold):
+        click.echo("\n".join(["", "Regressions:", *regressions]))
+        raise SystemExit(1)
@@ -1,37 +1,48 @@
+"""
+Bootstrap layout and content components built from the HTML elements.
+
+Each component's `render()` expands it into plain elements. They are all
+`Templated`, so the markup around their children is compiled once and later
+renders only escape the declared slot fields (page title and description,
+column size, variants) and render the children.
+"""
+
 from colgandev.html.html_components import (
     HTML,
     Body,
-    Component,
     Div,
     Head,
     Link,
     Meta,
     Title,
 )
+from colgandev.html.templates import Templated
 
 
 # Custom Components using render() method
-class Card(Component):
+class Card(Templated):
     def render(self):
         return Div(class_="card")(*self.children)
 
 
-class CardHeader(Component):
+class CardHeader(Templated):
     def render(self):
         return Div(class_="card-header")(*self.children)
 
 
-class CardBody(Component):
+class CardBody(Templated):
     def render(self):
         return Div(class_="card-body")(*self.children)
 
 
-class CardFooter(Component):
+class CardFooter(Templated):
     def render(self):
         return Div(class_="card-footer")(*self.children)
 
 
-class Layout(Component):
+class Layout(Templated):
+    template_slots = ("page_title", "description")
+
     page_title: str = "Colgan Development"
     description: str = "David Colgan's development tools and configuration"
 
@@ -56,31 +67,37 @@ class Layout(Component):
         )
 
 
-class Container(Component):
+class Container(Templated):
     def render(self):
         return Div(class_="container py-4")(*self.children)
 
 
-class Row(Component):
+class Row(Templated):
     def render(self):
         return Div(class_="row")(*self.children)
 
 
-class Col(Component):
+class Col(Templated):
+    template_slots = ("size",)
+
     size: str = "12"
 
     def render(self):
         return Div(class_=f"col-{self.size}")(*self.children)
 
 
-class Alert(Component):
+class Alert(Templated):
+    template_slots = ("variant",)
+
     variant: str = "primary"
 
     def render(self):
         return Div(class_=f"alert alert-{self.variant}")(*self.children)
 
 
-class Badge(Component):
+class Badge(Templated):
+    template_slots = ("variant",)
+
     variant: str = "primary"
 
     def render(self):
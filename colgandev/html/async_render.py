@@ -0,0 +1,106 @@
+"""
+Components whose content is produced by an `async def render()`.
+
+An `AsyncComponent` fetches its own data (a subprocess, a file scan, an HTTP
+call) instead of relying on the route to fetch it first. The synchronous
+renderer cannot await, so a tree holding async components goes through
+`render_async()`. That first calls `resolve_async()`, which finds every
+unresolved async component in the tree, runs all their `render()` coroutines
+concurrently with `asyncio.gather`, and resolves any async components in their
+results in the next round. It then returns a new tree with each result in
+place of its component: ancestors of a replaced node are copied with
+`model_copy`, everything else is shared, and the tree passed in (which may be
+frozen) is left untouched. The resolved tree renders like any other, so a page
+of six slow cards costs as much as the slowest one.
+
+Each component's `render()` is bounded by its `timeout` field (seconds, None
+for no limit). A timeout or exception is logged and replaced by `fallback()`,
+an empty `Fragment` unless overridden, so one failing card cannot take the page
+down. Async components are found in the tree as it was constructed: one created
+inside a synchronous `render()` is not seen and fails loudly when rendered.
+"""
+
+import asyncio
+import logging
+from abc import abstractmethod
+
+from fastapi.responses import HTMLResponse
+
+from colgandev.html.html_components import DEFAULT_FORMAT, Component, Fragment, HTMLFormat, HTMLPart, render
+
+logger = logging.getLogger(__name__)
+
+ASYNC_RENDER_TIMEOUT = 5.0
+
+
+class AsyncComponent(Component):
+    timeout: float | None = ASYNC_RENDER_TIMEOUT
+
+    @abstractmethod
+    async def render(self) -> Component: ...
+
+    def fallback(self) -> Component:
+        return Fragment()
+
+    async def resolve(self) -> Component:
+        try:
+            return await asyncio.wait_for(self.render(), self.timeout)
+        except TimeoutError:
+            logger.warning("%s did not render within %ss", type(self).__name__, self.timeout)
+        except Exception:
+            logger.exception("%s failed to render", type(self).__name__)
+        return self.fallback()
+
+    def html_parts(self, fmt: HTMLFormat, depth: int) -> list[HTMLPart]:
+        raise RuntimeError(f"{type(self).__name__} must be resolved with render_async() before rendering")
+
+
+def find_async(root: Component) -> list[AsyncComponent]:
+    found = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, AsyncComponent):
+            found.append(node)
+        else:
+            stack.extend(node.children)
+    return found
+
+
+def replace_resolved(root: Component, resolved: dict[int, tuple[AsyncComponent, Component]]) -> Component:
+    def final(node: Component) -> Component:
+        while (entry := resolved.get(id(node))) is not None:
+            node = entry[1]
+        return node
+
+    root = final(root)
+    rebuilt: dict[int, Component] = {}
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if id(node) in rebuilt:
+            continue
+        children = [final(child) for child in node.children]
+        if not expanded:
+            stack.append((node, True))
+            stack.extend((child, False) for child in children)
+            continue
+        new_children = [rebuilt[id(child)] for child in children]
+        changed = any(new is not old for new, old in zip(new_children, node.children, strict=True))
+        rebuilt[id(node)] = node.model_copy(update={"children": new_children}) if changed else node
+    return rebuilt[id(root)]
+
+
+async def resolve_async(component: Component) -> Component:
+    resolved: dict[int, tuple[AsyncComponent, Component]] = {}
+    pending = find_async(component)
+    while pending:
+        results = await asyncio.gather(*(node.resolve() for node in pending))
+        for node, result in zip(pending, results, strict=True):
+            resolved[id(node)] = (node, result)
+        pending = [found for result in results for found in find_async(result)]
+    return replace_resolved(component, resolved) if resolved else component
+
+
+async def render_async(component: Component, fmt: HTMLFormat = DEFAULT_FORMAT) -> HTMLResponse:
+    return render(await resolve_async(component), fmt)
@@ -0,0 +1,109 @@
+"""
+Minimal HTMX updates computed by diffing two component trees.
+
+`diff_oob(old, new)` compares the tree a client is showing with the tree it
+should show and returns only the changed parts, as elements carrying
+`hx-swap-oob="true"`. HTMX swaps each one into the page in place of the
+element with the same `id`, so a dashboard update costs a few hundred bytes
+instead of a full page.
+
+Both trees are expanded through `render()` first, so custom components are
+compared by the elements they produce. Two nodes match when their class,
+attributes and the sequence of child (class, id) pairs agree; children are
+then compared pairwise. Identical subtrees are skipped: each tree is indexed
+once, bottom-up, giving every expanded node a small integer for its shape
+(its class, attributes and its children's shapes), so comparing two subtrees
+is one integer comparison, and matched pairs are walked with an explicit
+stack, so any depth works. A change that cannot be expressed inside a matched node (different attributes,
+or children added, removed or reordered) is sent as the nearest enclosing
+element that has a stable `id` in both trees. When no such element exists the
+diff returns None and the caller should send the full page.
+"""
+
+from colgandev.html.html_components import Component, HTMLFormat
+
+
+def expand(node: Component) -> Component:
+    while (rendered := node.render()) is not node:
+        node = rendered
+    return node
+
+
+def child_signature(children: list[Component]) -> list[tuple]:
+    return [(type(child), child.id) for child in children]
+
+
+type Shapes = dict[int, tuple[int, list[Component]]]
+
+
+def index_shapes(root: Component, shapes: dict[tuple, int]) -> tuple[Component, Shapes]:
+    root = expand(root)
+    nodes: Shapes = {}
+    stack: list[tuple[Component, list[Component] | None]] = [(root, None)]
+    while stack:
+        node, children = stack.pop()
+        if children is None:
+            children = [expand(child) for child in node.children]
+            stack.append((node, children))
+            stack.extend((child, None) for child in children)
+        else:
+            shape = (node.shallow_key(), tuple(nodes[id(child)][0] for child in children))
+            nodes[id(node)] = (shapes.setdefault(shape, len(shapes)), children)
+    return root, nodes
+
+
+type Anchors = tuple[Component, "Anchors"] | None
+
+
+def changed_subtrees(old: Component, new: Component) -> list[Component] | None:
+    shapes: dict[tuple, int] = {}
+    old, old_nodes = index_shapes(old, shapes)
+    new, new_nodes = index_shapes(new, shapes)
+
+    # Each change carries its chain of enclosing replaceable nodes, innermost first.
+    events: list[tuple[Component | None, Anchors]] = []
+    failed: set[int] = set()
+    stack: list[tuple[Component, Component, Anchors]] = [(old, new, None)]
+    while stack:
+        old, new, anchors = stack.pop()
+        (old_shape, old_children), (new_shape, new_children) = old_nodes[id(old)], new_nodes[id(new)]
+        if old_shape == new_shape:
+            continue
+        replaceable = new.id is not None and old.id == new.id
+        if old.shallow_key() != new.shallow_key() or child_signature(old_children) != child_signature(new_children):
+            if replaceable:
+                events.append((new, anchors))
+            elif anchors is None:
+                return None
+            else:
+                failed.add(id(anchors[0]))
+                events.append((None, anchors))
+            continue
+        if replaceable:
+            anchors = (new, anchors)
+        pairs = zip(old_children, new_children, strict=True)
+        stack.extend((old_child, new_child, anchors) for old_child, new_child in reversed(list(pairs)))
+
+    changes = []
+    replaced: set[int] = set()
+    for change, anchors in events:
+        outermost = None
+        while anchors is not None:
+            if id(anchors[0]) in failed:
+                outermost = anchors[0]
+            anchors = anchors[1]
+        if outermost is None:
+            changes.append(change)
+        elif id(outermost) not in replaced:
+            replaced.add(id(outermost))
+            changes.append(outermost)
+    return changes
+
+
+def diff_oob(old: Component, new: Component, fmt: HTMLFormat = HTMLFormat.MINIFIED) -> str | None:
+    changes = changed_subtrees(old, new)
+    if changes is None:
+        return None
+    return fmt.line_break(0).join(
+        change.model_copy(update={"hx_swap_oob": "true"}).render_html(fmt) for change in changes
+    )
@@ -0,0 +1,189 @@
+"""
+Server-side inlining of small `/_/` embeds in rendered Markdown.
+
+`URLEmbedPreprocessor` turns a line holding only a `/_/...` URL into an empty
+`<div hx-get=... hx-trigger="revealed">`, so a note with 30 embedded assets
+costs 30 requests after the page loads. When the INLINE_EMBEDS setting is on,
+the `render_markdown` filter passes its output through `inline_embeds()`. That
+function resolves the placeholders' URLs in-process and replaces each small
+result with `<div>{fragment}</div>`, the DOM HTMX would have produced after
+the swap. This runs after conversion, so the Markdown caches only ever hold
+the stable placeholder form.
+
+Fragments come from resolvers registered with `@embed_resolver(prefix)`, plain
+functions from a URL (path and query) to HTML, or None when there is nothing to
+inline. URLs under no registered prefix stay lazy. Results are kept in
+`embed_cache`, keyed by URL. Entries expire after `EMBED_CACHE_TTL` seconds,
+and the least recently used are evicted once the stored fragments exceed
+`EMBED_CACHE_MAX_BYTES` or the cache holds more than `EMBED_CACHE_MAX_ENTRIES`.
+Missing, failed and oversized results are cached too, as a decision to stay
+lazy, so they are not retried on every render. They store no fragment, so only
+the entry cap bounds them.
+
+Misses are resolved concurrently on a small thread pool, and one document waits
+at most `INLINE_EMBED_TIMEOUT` for all of them. Fragments over
+`INLINE_EMBED_MAX_BYTES`, and resolutions still running when the wait ends,
+keep their HTMX placeholder. A slow resolution keeps running and fills the
+cache, so later renders inline it. Concurrent renders of the same URL share one
+in-flight resolution. The wait blocks the calling thread, so keep the timeout
+small when rendering on an event loop.
+"""
+
+import html
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+INLINE_EMBED_MAX_BYTES = 16 * 1024
+
+INLINE_EMBED_TIMEOUT = 0.05
+
+EMBED_CACHE_TTL = 60.0
+
+EMBED_CACHE_MAX_BYTES = 4 * 1024 * 1024
+
+EMBED_CACHE_MAX_ENTRIES = 4096
+
+EMBED_RESOLVE_WORKERS = 8
+
+EMBED_PLACEHOLDER = re.compile(r'<div hx-get="(/_/[^"]*)" hx-trigger="revealed"></div>')
+
+type EmbedResolver = Callable[[str], str | None]
+
+embed_resolvers: dict[str, EmbedResolver] = {}
+
+
+def embed_resolver(prefix: str):
+    def decorator(resolver: EmbedResolver) -> EmbedResolver:
+        embed_resolvers[prefix] = resolver
+        return resolver
+
+    return decorator
+
+
+@dataclass(frozen=True, slots=True)
+class CachedEmbed:
+    expires: float
+    html: str | None
+
+    @property
+    def size(self) -> int:
+        return len(self.html or "")
+
+
+class EmbedCache:
+    def __init__(
+        self,
+        max_bytes: int = EMBED_CACHE_MAX_BYTES,
+        ttl: float = EMBED_CACHE_TTL,
+        max_entries: int = EMBED_CACHE_MAX_ENTRIES,
+    ):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.size = 0
+        self.entries: OrderedDict[str, CachedEmbed] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, url: str) -> CachedEmbed | None:
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is None:
+                return None
+            if entry.expires <= time.monotonic():
+                del self.entries[url]
+                self.size -= entry.size
+                return None
+            self.entries.move_to_end(url)
+            return entry
+
+    def store(self, url: str, fragment: str | None) -> CachedEmbed:
+        if fragment is not None and len(fragment) > INLINE_EMBED_MAX_BYTES:
+            fragment = None
+        entry = CachedEmbed(time.monotonic() + self.ttl, fragment)
+        with self.lock:
+            if (previous := self.entries.pop(url, None)) is not None:
+                self.size -= previous.size
+            self.entries[url] = entry
+            self.size += entry.size
+            while self.size > self.max_bytes or len(self.entries) > self.max_entries:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= evicted.size
+        return entry
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+embed_cache = EmbedCache()
+
+resolve_pool = ThreadPoolExecutor(EMBED_RESOLVE_WORKERS, thread_name_prefix="embed")
+
+in_flight: dict[str, Future] = {}
+
+in_flight_lock = threading.Lock()
+
+
+def resolve(url: str) -> str | None:
+    resolver = next((resolver for prefix, resolver in embed_resolvers.items() if url.startswith(prefix)), None)
+    if resolver is None:
+        return None
+    try:
+        return resolver(url)
+    except Exception:
+        logger.exception("Embed %s failed to resolve", url)
+        return None
+
+
+def finish(url: str, future: Future):
+    embed_cache.store(url, future.result())
+    with in_flight_lock:
+        in_flight.pop(url, None)
+
+
+def fetch(url: str) -> Future:
+    with in_flight_lock:
+        future = in_flight.get(url)
+        started = future is None
+        if started:
+            future = in_flight[url] = resolve_pool.submit(resolve, url)
+    if started:
+        future.add_done_callback(lambda done: finish(url, done))
+    return future
+
+
+def inline_embeds(markup: str, timeout: float = INLINE_EMBED_TIMEOUT) -> str:
+    if 'hx-get="/_/' not in markup:
+        return markup
+
+    fragments: dict[str, str | None] = {}
+    pending: dict[str, Future] = {}
+    for url in {html.unescape(match.group(1)) for match in EMBED_PLACEHOLDER.finditer(markup)}:
+        if (entry := embed_cache.get(url)) is not None:
+            fragments[url] = entry.html
+        else:
+            pending[url] = fetch(url)
+
+    if pending:
+        wait(pending.values(), timeout=timeout)
+        for url, future in pending.items():
+            if future.done() and (fragment := future.result()) is not None and len(fragment) <= INLINE_EMBED_MAX_BYTES:
+                fragments[url] = fragment
+
+    def substitute(match: re.Match) -> str:
+        fragment = fragments.get(html.unescape(match.group(1)))
+        return match.group(0) if fragment is None else f"<div>{fragment}</div>"
+
+    return EMBED_PLACEHOLDER.sub(substitute, markup)
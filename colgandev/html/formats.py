@@ -0,0 +1,464 @@
+"""
+HTML, Markdown and plain text from a single walk over a component tree.
+
+`render_formats()` walks the tree once with an explicit stack, like
+`write_parts`, and returns all three renderings together. The HTML is
+byte-identical to `render_html` with the same format. Markdown and text come
+from writers that are told about every element as it opens and closes, about
+every piece of text in document order, and about the line breaks between
+sibling elements, which a browser shows as a space, whenever the format is not
+minified. What a writer does for an element
+is looked up by tag in its emitter table: `markdown_emitters` and
+`text_emitters` map tag names to `TagEmitter`s, whose `open` and `close`
+callables receive the writer and the node. Tags without an entry are inline
+and transparent. Projects can add or replace entries in either table, or pass
+their own tables to `render_formats()`.
+
+Plain elements (classes that override neither `render()` nor `html_parts()`)
+are expanded here, mirroring `Component.html_parts` except that text children
+stay separate nodes so the writers see them in order. Every other node is
+transparent to the writers: its `html_parts()` provide the HTML and its child
+entries are walked as usual, so custom components, `Templated` and `Fragment`
+contribute only their content. `Static` emits its cached HTML, and its
+children are walked for the writers only. `RawHTML` passes through to Markdown
+unchanged and is left out of the text. Nodes whose `html_parts()` has no child
+entries (`DataTable`, for instance) appear in the HTML only.
+
+The Markdown covers headings, paragraphs, emphasis, inline code, fenced
+preformatted blocks, links, images, nested ordered and unordered lists, block
+quotes, rules, line breaks and pipe tables. Text is whitespace-collapsed and
+escaped, and `<head>`, `<script>` and `<style>` are skipped. The text form is
+one line per block with no markup, meant for search indexes and previews.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from colgandev.html.html_components import (
+    DEFAULT_FORMAT,
+    PREFORMATTED_ELEMENTS,
+    VOID_ELEMENTS,
+    Component,
+    HTMLFormat,
+    RawHTML,
+    TextComponent,
+    text_escapes,
+)
+from colgandev.html.static import Static
+
+MARKDOWN_SPECIAL = str.maketrans({char: f"\\{char}" for char in "\\`*_[]<>#|"})
+
+BLOCK_ELEMENTS = frozenset(
+    {"div", "p", "section", "article", "header", "footer", "main", "nav", "aside", "form", "figure", "address"}
+)
+
+
+def collapse_whitespace(text: str, at_line_start: bool) -> str:
+    collapsed = " ".join(text.split())
+    if not collapsed:
+        return "" if at_line_start or not text else " "
+    if text[0].isspace() and not at_line_start:
+        collapsed = " " + collapsed
+    if text[-1].isspace():
+        collapsed += " "
+    return collapsed
+
+
+class Writer:
+    def __init__(self, emitters: dict[str, "TagEmitter"]):
+        self.emitters = emitters
+        self.out: list[str] = []
+        self.newlines = 0
+        self.blank_prefix = ""
+        self.at_line_start = True
+        self.spaced = False
+        self.skipped = 0
+        self.preformatted = 0
+        self.code = 0
+        self.prefixes: list[str] = []
+        self.lists: list[int | None] = []
+        self.tables: list[list[int]] = []
+        self.cells = 0
+
+    def open(self, node: Component):
+        if emitter := self.emitters.get(node.tag):
+            emitter.open(self, node)
+
+    def close(self, node: Component):
+        if emitter := self.emitters.get(node.tag):
+            emitter.close(self, node)
+
+    def block(self):
+        if not self.cells:
+            prefix = "".join(self.prefixes).rstrip()
+            if self.newlines < 2 or len(prefix) < len(self.blank_prefix):
+                self.blank_prefix = prefix
+            self.newlines = 2
+
+    def line(self):
+        if not self.cells:
+            self.newlines = max(self.newlines, 1)
+
+    def space(self):
+        self.spaced = True
+
+    def write(self, markup: str):
+        if not markup or self.skipped:
+            return
+        prefix = "".join(self.prefixes)
+        if self.out and self.newlines:
+            self.out.append(f"\n{self.blank_prefix}" * (self.newlines - 1) + f"\n{prefix}")
+        elif not self.out:
+            self.out.append(prefix)
+        elif self.spaced and not self.at_line_start and not markup[0].isspace() and not self.out[-1].endswith(" "):
+            self.out.append(" ")
+        self.newlines = 0
+        self.spaced = False
+        self.out.append(markup.replace("\n", f"\n{prefix}") if prefix else markup)
+        self.at_line_start = markup.endswith("\n")
+
+    def text(self, text: str):
+        if self.preformatted:
+            self.write(text)
+        else:
+            self.write(collapse_whitespace(text, self.at_line_start or bool(self.newlines)))
+
+    def raw(self, html: str):
+        pass
+
+    def result(self) -> str:
+        return "".join(self.out).strip("\n")
+
+
+class MarkdownWriter(Writer):
+    def text(self, text: str):
+        if self.preformatted:
+            self.write(text)
+            return
+        collapsed = collapse_whitespace(text, self.at_line_start or bool(self.newlines))
+        self.write(collapsed if self.code else collapsed.translate(MARKDOWN_SPECIAL))
+
+    def raw(self, html: str):
+        self.write(html)
+
+    def result(self) -> str:
+        return "".join(self.out).strip("\n") + "\n"
+
+
+class TextWriter(Writer):
+    def block(self):
+        self.line()
+
+    def result(self) -> str:
+        lines = ("".join(self.out)).splitlines()
+        return "\n".join(stripped for line in lines if (stripped := line.strip()))
+
+
+@dataclass(frozen=True, slots=True)
+class TagEmitter:
+    open: Callable[[Writer, Component], None] = lambda writer, node: None
+    close: Callable[[Writer, Component], None] = lambda writer, node: None
+
+
+def wrap(markup: str) -> TagEmitter:
+    return TagEmitter(lambda writer, node: writer.write(markup), lambda writer, node: writer.write(markup))
+
+
+def blocks() -> TagEmitter:
+    return TagEmitter(lambda writer, node: writer.block(), lambda writer, node: writer.block())
+
+
+def skip(writer: Writer, node: Component):
+    writer.skipped += 1
+
+
+def unskip(writer: Writer, node: Component):
+    writer.skipped -= 1
+
+
+def open_heading(writer: Writer, node: Component):
+    writer.block()
+    writer.write("#" * int(node.tag[1]) + " ")
+
+
+def open_list(writer: Writer, node: Component):
+    writer.line() if writer.lists else writer.block()
+    writer.lists.append(1 if node.tag == "ol" else None)
+
+
+def close_list(writer: Writer, node: Component):
+    writer.lists.pop()
+    writer.line() if writer.lists else writer.block()
+
+
+def open_item(writer: Writer, node: Component):
+    writer.line()
+    number = writer.lists[-1] if writer.lists else None
+    marker = "- " if number is None else f"{number}. "
+    if number is not None:
+        writer.lists[-1] = number + 1
+    writer.write(marker)
+    writer.prefixes.append(" " * max(len(marker), 4))
+
+
+def close_item(writer: Writer, node: Component):
+    writer.prefixes.pop()
+    writer.line()
+
+
+def open_link(writer: Writer, node: Component):
+    if getattr(node, "href", None):
+        writer.write("[")
+
+
+def close_link(writer: Writer, node: Component):
+    if href := getattr(node, "href", None):
+        writer.write(f"]({href})")
+
+
+def image(writer: Writer, node: Component):
+    alt = (getattr(node, "alt", None) or "").translate(MARKDOWN_SPECIAL)
+    writer.write(f"![{alt}]({getattr(node, 'src', None) or ''})")
+
+
+def open_code(writer: Writer, node: Component):
+    if not writer.preformatted:
+        writer.write("`")
+        writer.code += 1
+
+
+def close_code(writer: Writer, node: Component):
+    if writer.code:
+        writer.code -= 1
+        writer.write("`")
+
+
+def open_preformatted(writer: Writer, node: Component):
+    writer.block()
+    writer.preformatted += 1
+
+
+def close_preformatted(writer: Writer, node: Component):
+    writer.preformatted -= 1
+    writer.block()
+
+
+def open_pre(writer: Writer, node: Component):
+    writer.block()
+    writer.write("```\n")
+    writer.preformatted += 1
+
+
+def close_pre(writer: Writer, node: Component):
+    writer.preformatted -= 1
+    if not writer.at_line_start:
+        writer.write("\n")
+    writer.write("```")
+    writer.block()
+
+
+def open_quote(writer: Writer, node: Component):
+    writer.block()
+    writer.prefixes.append("> ")
+
+
+def close_quote(writer: Writer, node: Component):
+    writer.prefixes.pop()
+    writer.block()
+
+
+def rule(writer: Writer, node: Component):
+    writer.block()
+    writer.write("---")
+    writer.block()
+
+
+def line_break(writer: Writer, node: Component):
+    writer.write("\\")
+    writer.line()
+
+
+def open_table(writer: Writer, node: Component):
+    writer.block()
+    writer.tables.append([0, 0])
+
+
+def close_table(writer: Writer, node: Component):
+    writer.tables.pop()
+    writer.block()
+
+
+def open_row(writer: Writer, node: Component):
+    writer.line()
+    writer.write("|")
+    if writer.tables:
+        writer.tables[-1][1] = 0
+
+
+def close_row(writer: Writer, node: Component):
+    if writer.tables:
+        rows, cells = writer.tables[-1]
+        if not rows:
+            writer.line()
+            writer.write("|" + " --- |" * cells)
+        writer.tables[-1][0] += 1
+    writer.line()
+
+
+def open_cell(writer: Writer, node: Component):
+    writer.write(" ")
+    writer.cells += 1
+
+
+def close_cell(writer: Writer, node: Component):
+    writer.cells -= 1
+    writer.write(" |")
+    if writer.tables:
+        writer.tables[-1][1] += 1
+
+
+def open_text_cell(writer: Writer, node: Component):
+    writer.write(" ")
+
+
+def image_text(writer: Writer, node: Component):
+    writer.text(f" {getattr(node, 'alt', None) or ''} ")
+
+
+markdown_emitters: dict[str, TagEmitter] = {
+    **{tag: blocks() for tag in BLOCK_ELEMENTS},
+    **{f"h{level}": TagEmitter(open_heading, lambda writer, node: writer.block()) for level in range(1, 7)},
+    **{tag: TagEmitter(skip, unskip) for tag in ("head", "script", "style", "template")},
+    **{tag: wrap("**") for tag in ("strong", "b")},
+    **{tag: wrap("*") for tag in ("em", "i")},
+    "ul": TagEmitter(open_list, close_list),
+    "ol": TagEmitter(open_list, close_list),
+    "li": TagEmitter(open_item, close_item),
+    "a": TagEmitter(open_link, close_link),
+    "img": TagEmitter(image),
+    "code": TagEmitter(open_code, close_code),
+    "pre": TagEmitter(open_pre, close_pre),
+    "blockquote": TagEmitter(open_quote, close_quote),
+    "hr": TagEmitter(rule),
+    "br": TagEmitter(line_break),
+    "table": TagEmitter(open_table, close_table),
+    "tr": TagEmitter(open_row, close_row),
+    "th": TagEmitter(open_cell, close_cell),
+    "td": TagEmitter(open_cell, close_cell),
+}
+
+text_emitters: dict[str, TagEmitter] = {
+    **{tag: blocks() for tag in (*BLOCK_ELEMENTS, "ul", "ol", "li", "table", "tr", "blockquote", "hr", "br")},
+    **{f"h{level}": blocks() for level in range(1, 7)},
+    **{tag: TagEmitter(skip, unskip) for tag in ("head", "script", "style", "template")},
+    "pre": TagEmitter(open_preformatted, close_preformatted),
+    "th": TagEmitter(open_text_cell),
+    "td": TagEmitter(open_text_cell),
+    "img": TagEmitter(image_text),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class RenderedFormats:
+    html: str
+    markdown: str
+    text: str
+
+
+class Close:
+    __slots__ = ("node",)
+
+    def __init__(self, node: Component):
+        self.node = node
+
+
+class Space:
+    __slots__ = ("html",)
+
+    def __init__(self, html: str):
+        self.html = html
+
+
+def is_element(node: Component) -> bool:
+    cls = type(node)
+    return cls.render is Component.render and cls.html_parts is Component.html_parts
+
+
+def render_formats(
+    component: Component,
+    fmt: HTMLFormat = DEFAULT_FORMAT,
+    markdown: dict[str, TagEmitter] = markdown_emitters,
+    text: dict[str, TagEmitter] = text_emitters,
+) -> RenderedFormats:
+    html: list[str] = []
+    writers = (MarkdownWriter(markdown), TextWriter(text))
+    stack: list = [(component, fmt, 0, True)]
+    while stack:
+        item = stack.pop()
+        if type(item) is str:
+            html.append(item)
+            continue
+        if type(item) is Close:
+            for writer in writers:
+                writer.close(item.node)
+            continue
+        if type(item) is Space:
+            html.append(item.html)
+            for writer in writers:
+                writer.space()
+            continue
+
+        node, fmt, depth, emit_html = item
+        if type(node) is TextComponent:
+            if emit_html:
+                html.append(text_escapes.escape(node.text))
+            for writer in writers:
+                writer.text(node.text)
+        elif type(node) is RawHTML:
+            if emit_html:
+                html.append(node.html)
+            for writer in writers:
+                writer.raw(node.html)
+        elif isinstance(node, Static):
+            if emit_html:
+                html.extend(part for part in node.html_parts(fmt, depth) if type(part) is str)
+            stack.extend((child, fmt, depth, False) for child in reversed(node.children))
+        elif is_element(node):
+            for writer in writers:
+                writer.open(node)
+            stack.append(Close(node))
+            stack.extend(reversed(element_parts(node, fmt, depth, emit_html)))
+        else:
+            parts = node.html_parts(fmt, depth)
+            stack.extend(
+                (*part, emit_html) if type(part) is tuple else part
+                for part in reversed(parts)
+                if emit_html or type(part) is tuple
+            )
+
+    return RenderedFormats(html="".join(html), markdown=writers[0].result(), text=writers[1].result())
+
+
+def element_parts(node: Component, fmt: HTMLFormat, depth: int, emit_html: bool) -> list:
+    tag = node.tag
+    children = node.children
+    parts: list = [node.open_tag()] if emit_html else []
+    if tag not in VOID_ELEMENTS:
+        if fmt is HTMLFormat.MINIFIED or tag in PREFORMATTED_ELEMENTS or not children:
+            parts.extend((child, HTMLFormat.MINIFIED, 0, emit_html) for child in children)
+        else:
+            # The line break between two elements renders as a space, which the writers must see too.
+            line_break = fmt.line_break(depth + 1) if emit_html else ""
+            previous = TextComponent
+            for child in children:
+                if previous is not TextComponent and type(child) is not TextComponent:
+                    parts.append(Space(line_break))
+                elif line_break:
+                    parts.append(line_break)
+                parts.append((child, fmt, depth + 1, emit_html))
+                previous = type(child)
+            if emit_html:
+                parts.append(fmt.line_break(depth))
+        if emit_html:
+            parts.append(f"</{tag}>")
+    return parts
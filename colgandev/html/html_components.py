@@ -4,13 +4,133 @@ HTML component classes for building web UIs with type safety and validation.
 This module provides Pydantic-based classes for all standard HTML elements,
 with proper attribute validation and HTML rendering capabilities. Components
 can be composed together to build complex UIs while maintaining type safety.
+
+Attribute serialization is compiled once per class: when a subclass is
+defined, its `str | None` fields become escaped attributes, its `bool | None`
+fields become bare boolean attributes, and URL-bearing fields (href, src,
+action, hx-get) go through `validate_url`. The HTML name is the field alias
+when one is set (`class_` -> `class`, `for_` -> `for`). Fields of any other
+type (tag, children, text, or the props of custom components like `Col.size`)
+are never emitted. Rendering a node is then a walk over that precomputed plan
+rather than a per-class chain of checks, and every element carries the base
+attributes, including the HTMX ones.
+
+Pages repeat the same class strings, URLs and short labels many times, so
+escaping goes through `EscapeCache`s: a dict from raw to escaped (and interned)
+string, bounded by entry count with oldest-first eviction and skipping values
+too long to be worth keeping. Only plain `str` values are stored, since
+subclasses such as a `StrEnum` or a `SafeString` (kept as-is by trusted
+construction and `model_copy`) cannot be interned; they are escaped every time.
+Hits are a lock-free dict lookup; misses insert and evict, and `clear()`
+empties, under a lock, since pages render on several threads at once. The hit
+and miss counters are unlocked and may undercount slightly.
+`escape_cache_stats()` reports hits, misses and hit rate per cache to show
+whether the caches pay off on a given page.
+`Fragment` groups children without emitting a tag of its own.
+
+Rendering is a loop over an explicit stack, not a recursion. A node's
+`html_parts` returns its output as strings interleaved with `(child, format,
+depth)` entries for whatever it wraps (or, for a custom component, the single
+node its `render()` returned). `write_parts` and `iter_parts` keep a stack of
+iterators over those lists: strings are emitted in order, and an entry pushes
+an iterator over the child's parts until it runs out. Python stack usage stays
+constant however deeply the tree nests, and a node costs one method call
+instead of one per level of `render()` indirection. `render_html` collects
+everything into one list and joins it exactly once. Custom leaf types override
+`html_parts`, never `iter_html` or `render_html`.
+
+Construction normally runs full Pydantic validation. Inside `with trusted():`
+(also usable as a decorator on a sync page builder) components skip it: keyword
+arguments, by name or alias, are written straight into the instance with the
+class's precomputed defaults, and childless nodes share an empty tuple instead
+of allocating a list. Trusted nodes are only as correct as their inputs, so the
+context is a no-op when the DEBUG setting is on, which the test suite enables.
+
+Calling a node appends to its children in place, so a mutable node must not be
+shared between requests. `freeze()` returns the shared immutable equivalent of
+a tree, built bottom-up with an explicit stack so any depth works. Frozen nodes
+keep their children in a tuple, refuse attribute assignment, and return a new
+frozen node when called. They are hash-consed: structurally identical frozen
+trees are one instance, looked up in a weak table by class, field and private
+values, and the identity of their (already canonical) children. Each frozen
+node caches its hash in a `FrozenState`, a dict subclass that replaces the
+node's Pydantic private slot (keeping any `PrivateAttr` values) and marks the
+node as frozen by its type. Frozen fragments can be hoisted to module scope and
+used as cheap dictionary keys, which `Static` does. Field values must be
+hashable to freeze. Copies of a frozen node (`model_copy`) are mutable again.
+Mutable nodes stay unhashable.
+
+`render` returns the whole page at once; `render_stream` sends the same markup
+as a `StreamingResponse` driven by the same walk through `iter_html`. Elements flagged with
+`flush_after` (the document `<head>`) end their output with `FLUSH`, so the
+doctype, meta tags and stylesheet links leave in the first chunk and the
+browser can start fetching CSS while the body is still being rendered. The rest
+is batched into chunks of roughly `STREAM_CHUNK_SIZE` characters.
+
+Formatting happens during the same walk: `HTMLFormat.PRETTY` puts every node on
+its own line indented by depth, `COMPACT` breaks lines without indenting, and
+`MINIFIED` adds no whitespace at all. Content of whitespace-sensitive elements
+(pre, textarea, script, style) is always emitted verbatim. Responses use the
+`HTML_FORMAT` setting; `format_html` remains for prettifying arbitrary HTML
+strings and imports BeautifulSoup only when called.
 """
 
 import html
+import sys
+import threading
+import weakref
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import StrEnum
+from types import NoneType
+from typing import ClassVar, get_args
+
+from fastapi.responses import HTMLResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field
+
+from colgandev.settings import DEBUG, HTML_FORMAT
+
+URL_ATTRIBUTES = frozenset({"href", "src", "action", "hx-get"})
+
+VOID_ELEMENTS = frozenset({"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "wbr"})
+
+PREFORMATTED_ELEMENTS = frozenset({"pre", "textarea", "script", "style"})
+
+INDENT = "  "
+
+STREAM_CHUNK_SIZE = 16 * 1024
+
+ESCAPE_CACHE_SIZE = 4096
+
+# Empty chunks are no-ops for anything that joins iter_html(), so they double as flush markers.
+FLUSH = ""
+
+TRUSTED = ContextVar("trusted_construction", default=False)
+
+# Pydantic keeps instance state in slots; writing through their descriptors is cheaper than object.__setattr__.
+set_dict = BaseModel.__dict__["__dict__"].__set__
+set_fields_set = BaseModel.__dict__["__pydantic_fields_set__"].__set__
+set_extra = BaseModel.__dict__["__pydantic_extra__"].__set__
+set_private = BaseModel.__dict__["__pydantic_private__"].__set__
+
+type AttributePlan = tuple[tuple[str, str, Callable[[str], str] | None], ...]
+
+type HTMLPart = str | tuple["Component", "HTMLFormat", int]
+
+
+class HTMLFormat(StrEnum):
+    PRETTY = "pretty"
+    COMPACT = "compact"
+    MINIFIED = "minified"
+
+    def line_break(self, depth: int) -> str:
+        if self is HTMLFormat.PRETTY:
+            return "\n" + INDENT * depth
+        return "\n" if self is HTMLFormat.COMPACT else ""
+
 
-from bs4 import BeautifulSoup
-from fastapi.responses import HTMLResponse
-from pydantic import BaseModel, Field
+DEFAULT_FORMAT = HTMLFormat(HTML_FORMAT)
 
 
 def validate_url(url: str) -> str:
@@ -20,88 +140,408 @@ def validate_url(url: str) -> str:
     return html.escape(url)
 
 
+class EscapeCache:
+    def __init__(self, escape: Callable[[str], str], maxsize: int = ESCAPE_CACHE_SIZE, max_length: int = 256):
+        self.escape_uncached = escape
+        self.maxsize = maxsize
+        self.max_length = max_length
+        self.entries: dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def escape(self, value: str) -> str:
+        escaped = self.entries.get(value)
+        if escaped is not None:
+            self.hits += 1
+            return escaped
+
+        self.misses += 1
+        escaped = self.escape_uncached(value)
+        if len(value) <= self.max_length and type(value) is str and type(escaped) is str:
+            with self.lock:
+                if len(self.entries) >= self.maxsize:
+                    self.entries.pop(next(iter(self.entries)), None)
+                self.entries[sys.intern(value)] = sys.intern(escaped)
+        return escaped
+
+    def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self.entries),
+        }
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+attribute_escapes = EscapeCache(html.escape)
+url_escapes = EscapeCache(validate_url)
+text_escapes = EscapeCache(html.escape, max_length=64)
+
+
+def escape_cache_stats() -> dict[str, dict[str, float]]:
+    return {
+        "attributes": attribute_escapes.stats(),
+        "urls": url_escapes.stats(),
+        "text": text_escapes.stats(),
+    }
+
+
 def format_html(html_string: str) -> str:
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html_string, "html.parser")
     return soup.prettify()
 
 
-def render(component: "Component") -> HTMLResponse:
+def write_parts(out: list[str], parts: list[HTMLPart]):
+    append = out.append
+    stack = [iter(parts)]
+    push = stack.append
+    while stack:
+        for part in stack[-1]:
+            if type(part) is str:
+                append(part)
+            else:
+                node, fmt, depth = part
+                push(iter(node.html_parts(fmt, depth)))
+                break
+        else:
+            stack.pop()
+
+
+def iter_parts(parts: list[HTMLPart]) -> Iterator[str]:
+    stack = [iter(parts)]
+    push = stack.append
+    while stack:
+        for part in stack[-1]:
+            if type(part) is str:
+                yield part
+            else:
+                node, fmt, depth = part
+                push(iter(node.html_parts(fmt, depth)))
+                break
+        else:
+            stack.pop()
+
+
+def render(component: "Component", fmt: HTMLFormat = DEFAULT_FORMAT) -> HTMLResponse:
     """
     Render a FastAPI HTMLResponse from the provided component structure.
     """
 
-    return HTMLResponse(
-        format_html(
-            component.render_html(),
-        ),
-    )
+    return HTMLResponse(component.render_html(fmt))
+
+
+def stream_html(
+    component: "Component", fmt: HTMLFormat = DEFAULT_FORMAT, chunk_size: int = STREAM_CHUNK_SIZE
+) -> Iterator[str]:
+    buffer = []
+    size = 0
+    for chunk in component.iter_html(fmt):
+        if chunk:
+            buffer.append(chunk)
+            size += len(chunk)
+            if size < chunk_size:
+                continue
+        if buffer:
+            yield "".join(buffer)
+            buffer.clear()
+            size = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def render_stream(component: "Component", fmt: HTMLFormat = DEFAULT_FORMAT) -> StreamingResponse:
+    return StreamingResponse(stream_html(component, fmt), media_type="text/html")
+
+
+def compile_attribute_plan(cls: type["Component"]) -> AttributePlan:
+    plan = []
+    for name, field in cls.model_fields.items():
+        kinds = set(get_args(field.annotation))
+        attribute = field.alias or name
+        if kinds == {bool, NoneType}:
+            plan.append((name, f" {attribute}", None))
+        elif kinds == {str, NoneType}:
+            escape = url_escapes.escape if attribute in URL_ATTRIBUTES else attribute_escapes.escape
+            plan.append((name, f' {attribute}="', escape))
+    return tuple(plan)
+
+
+def prepare_component_class(cls: type["Component"]):
+    cls.attribute_plan = compile_attribute_plan(cls)
+    cls.field_lookup = {}
+    cls.field_defaults = {}
+    factories = []
+    for name, field in cls.model_fields.items():
+        cls.field_lookup[name] = name
+        if field.alias:
+            cls.field_lookup[field.alias] = name
+        if name == "children":
+            # Trusted nodes share an immutable empty tuple until __call__ gives them children.
+            cls.field_defaults[name] = ()
+        elif field.default_factory is not None:
+            factories.append((name, field.default_factory))
+        elif not field.is_required():
+            cls.field_defaults[name] = field.default
+    cls.field_factories = tuple(factories)
+
+
+@contextmanager
+def trusted():
+    token = TRUSTED.set(not DEBUG)
+    try:
+        yield
+    finally:
+        TRUSTED.reset(token)
+
+
+frozen_nodes: weakref.WeakValueDictionary[tuple, "Component"] = weakref.WeakValueDictionary()
+frozen_nodes_lock = threading.Lock()
+
+
+class FrozenState(dict):
+    __slots__ = ("hash",)
+
+
+def is_frozen(component: "Component") -> bool:
+    return type(component.__pydantic_private__) is FrozenState
+
+
+def frozen_node(component: "Component", children: tuple["Component", ...]) -> "Component":
+    cls = type(component)
+    private = component.__pydantic_private__ or {}
+    values = tuple(value for name, value in component.__dict__.items() if name != "children")
+    values += tuple(private.items())
+    key = (cls, values, tuple(map(id, children)))
+    with frozen_nodes_lock:
+        node = frozen_nodes.get(key)
+        if node is None:
+            node = cls.__new__(cls)
+            set_dict(node, {**component.__dict__, "children": children})
+            set_fields_set(node, set(component.__pydantic_fields_set__))
+            set_extra(node, None)
+            state = FrozenState(private)
+            state.hash = hash((cls, values, tuple(map(hash, children))))
+            set_private(node, state)
+            frozen_nodes[key] = node
+    return node
+
+
+def freeze(component: "Component") -> "Component":
+    frozen: dict[int, Component] = {}
+    stack = [(component, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if id(node) in frozen:
+            continue
+        if is_frozen(node):
+            frozen[id(node)] = node
+        elif expanded:
+            frozen[id(node)] = frozen_node(node, tuple(frozen[id(child)] for child in node.children))
+        else:
+            stack.append((node, True))
+            stack.extend((child, False) for child in node.children)
+    return frozen[id(component)]
+
+
+def thawed(component: "Component") -> "Component":
+    if is_frozen(component):
+        set_private(component, dict(component.__pydantic_private__) or None)
+    return component
 
 
 class Component(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    attribute_plan: ClassVar[AttributePlan] = ()
+    field_lookup: ClassVar[dict[str, str]] = {}
+    field_defaults: ClassVar[dict[str, object]] = {}
+    field_factories: ClassVar[tuple[tuple[str, Callable[[], object]], ...]] = ()
+    doctype: ClassVar[str] = ""
+    flush_after: ClassVar[bool] = False
+
     id: str | None = None
     class_: str | None = Field(None, alias="class")
     style: str | None = None
     title: str | None = None
     data_testid: str | None = Field(None, alias="data-testid")
     hidden: bool | None = None
+    hx_get: str | None = Field(None, alias="hx-get")
+    hx_trigger: str | None = Field(None, alias="hx-trigger")
+    hx_swap: str | None = Field(None, alias="hx-swap")
+    hx_swap_oob: str | None = Field(None, alias="hx-swap-oob")
     children: list["Component"] = Field(default_factory=list)
     tag: str = "div"
 
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs):
+        super().__pydantic_init_subclass__(**kwargs)
+        prepare_component_class(cls)
+
+    def __init__(self, /, **data):
+        if not TRUSTED.get():
+            super().__init__(**data)
+            return
+
+        cls = type(self)
+        values = cls.field_defaults.copy()
+        fields_set = set()
+        if data:
+            lookup = cls.field_lookup
+            for key, value in data.items():
+                if name := lookup.get(key):
+                    values[name] = value
+                    fields_set.add(name)
+        for name, factory in cls.field_factories:
+            values[name] = factory()
+        set_dict(self, values)
+        set_fields_set(self, fields_set)
+        set_extra(self, None)
+        set_private(self, None)
+
     def __call__(self, *args, **kwargs):
         # Convert all string arguments to TextComponent objects
-        for arg in args:
-            if isinstance(arg, str):
-                self.children.append(TextComponent(text=arg))
-            else:
-                self.children.append(arg)
+        children = [TextComponent(text=arg) if isinstance(arg, str) else arg for arg in args]
+        if is_frozen(self):
+            return freeze(self.model_copy(update={"children": [*self.children, *children]}))
+
+        existing = self.children
+        if not existing:
+            self.__dict__["children"] = children
+        elif type(existing) is list:
+            existing.extend(children)
+        else:
+            self.__dict__["children"] = [*existing, *children]
 
         return self
 
+    def __hash__(self) -> int:
+        if not is_frozen(self):
+            raise TypeError(f"unhashable mutable {type(self).__name__}; freeze() it first")
+        return self.__pydantic_private__.hash
+
+    def __setattr__(self, name: str, value):
+        if is_frozen(self):
+            raise TypeError(f"frozen {type(self).__name__} can't be modified")
+        super().__setattr__(name, value)
+
+    def __copy__(self):
+        return thawed(super().__copy__())
+
+    def __deepcopy__(self, memo: dict | None = None):
+        return thawed(super().__deepcopy__(memo))
+
     def render(self) -> "Component":
         return self
 
-    def render_html(self):
+    def render_attributes(self) -> str:
+        values = self.__dict__
+        parts = []
+        for name, prefix, escape in self.attribute_plan:
+            value = values[name]
+            if value:
+                parts.append(prefix if escape is None else f'{prefix}{escape(value)}"')
+        return "".join(parts)
+
+    def open_tag(self) -> str:
+        if self.tag in VOID_ELEMENTS:
+            return f"{self.doctype}<{self.tag}{self.render_attributes()} />"
+        return f"{self.doctype}<{self.tag}{self.render_attributes()}>"
+
+    def render_html(self, fmt: HTMLFormat = HTMLFormat.MINIFIED, depth: int = 0) -> str:
+        out = []
+        write_parts(out, [(self, fmt, depth)])
+        return "".join(out)
+
+    def iter_html(self, fmt: HTMLFormat = HTMLFormat.MINIFIED, depth: int = 0) -> Iterator[str]:
+        return iter_parts([(self, fmt, depth)])
+
+    def html_parts(self, fmt: HTMLFormat, depth: int) -> list[HTMLPart]:
         rendered = self.render()
-        attrs = []
-
-        if rendered.id:
-            attrs.append(f'id="{html.escape(rendered.id)}"')
-        if rendered.class_:
-            attrs.append(f'class="{html.escape(rendered.class_)}"')
-        if rendered.style:
-            attrs.append(f'style="{html.escape(rendered.style)}"')
-        if rendered.title:
-            attrs.append(f'title="{html.escape(rendered.title)}"')
-        if rendered.data_testid:
-            attrs.append(f'data-testid="{html.escape(rendered.data_testid)}"')
-        if rendered.hidden:
-            attrs.append("hidden")
-
-        attrs_str = " " + " ".join(attrs) if attrs else ""
-
-        if not rendered.children:
-            return f"<{rendered.tag}{attrs_str} />"
-
-        children_html = "".join(child.render_html() for child in rendered.children)
-        return f"<{rendered.tag}{attrs_str}>{children_html}</{rendered.tag}>"
-
-    def render_markdown(self):
-        if self.tag == "h1":
-            return f"# {self.children[0] if self.children else ''}\n"
-        elif self.tag == "h2":
-            return f"## {self.children[0] if self.children else ''}\n"
-        elif self.tag == "p":
-            return f"{self.children[0] if self.children else ''}\n\n"
-        else:
-            return str(self.children[0]) if self.children else ""
+        if rendered is not self:
+            return [(rendered, fmt, depth)]
+
+        tag = self.tag
+        parts: list[HTMLPart] = []
+        html = self.open_tag()
+        if tag not in VOID_ELEMENTS:
+            # Escaped text joins the surrounding markup instead of becoming a part of its own.
+            children = self.children
+            if fmt is HTMLFormat.MINIFIED or tag in PREFORMATTED_ELEMENTS or not children:
+                for child in children:
+                    if type(child) is TextComponent:
+                        html += text_escapes.escape(child.text)
+                    else:
+                        if html:
+                            parts.append(html)
+                            html = ""
+                        parts.append((child, HTMLFormat.MINIFIED, 0))
+            else:
+                line_break = fmt.line_break(depth + 1)
+                for child in children:
+                    html += line_break
+                    if type(child) is TextComponent:
+                        html += text_escapes.escape(child.text)
+                    else:
+                        parts.append(html)
+                        html = ""
+                        parts.append((child, fmt, depth + 1))
+                html += fmt.line_break(depth)
+            html += f"</{tag}>"
+        parts.append(html)
+
+        if self.flush_after:
+            parts.append(FLUSH)
+        return parts
+
+    def shallow_key(self) -> tuple:
+        return (type(self), tuple(value for name, value in self.__dict__.items() if name != "children"))
+
+    def structural_key(self) -> tuple:
+        # Flat pre-order with child counts: building, hashing and comparing it never recurses.
+        key = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            key += (*node.shallow_key(), len(node.children))
+            stack += reversed(node.children)
+        return tuple(key)
+
+    def render_markdown(self) -> str:
+        from colgandev.html.formats import render_formats
+
+        return render_formats(self).markdown
+
+
+prepare_component_class(Component)
+
+
+class Fragment(Component):
+    def html_parts(self, fmt: HTMLFormat, depth: int) -> list[HTMLPart]:
+        line_break = fmt.line_break(depth)
+        parts: list[HTMLPart] = []
+        for child in self.children:
+            if parts and line_break:
+                parts.append(line_break)
+            parts.append((child, fmt, depth))
+        return parts
 
 
 class TextComponent(Component):
     text: str
     tag: str = "span"
 
-    def render_html(self):
-        return html.escape(self.text)
+    def html_parts(self, fmt: HTMLFormat, depth: int) -> list[HTMLPart]:
+        return [text_escapes.escape(self.text)]
 
 
 # Basic HTML Elements
@@ -148,48 +588,12 @@ class A(Component):
     rel: str | None = None
     tag: str = "a"
 
-    def render_html(self):
-        rendered = self.render()
-        attrs = []
-
-        if rendered.id:
-            attrs.append(f'id="{html.escape(rendered.id)}"')
-        if rendered.class_:
-            attrs.append(f'class="{html.escape(rendered.class_)}"')
-        if rendered.href:
-            attrs.append(f'href="{validate_url(rendered.href)}"')
-        if rendered.target:
-            attrs.append(f'target="{html.escape(rendered.target)}"')
-        if rendered.rel:
-            attrs.append(f'rel="{html.escape(rendered.rel)}"')
-
-        attrs_str = " " + " ".join(attrs) if attrs else ""
-        children_html = "".join(child.render_html() for child in rendered.children)
-        return f"<{rendered.tag}{attrs_str}>{children_html}</{rendered.tag}>"
-
 
 class Button(Component):
     type: str | None = None
     disabled: bool | None = None
     tag: str = "button"
 
-    def render_html(self):
-        rendered = self.render()
-        attrs = []
-
-        if rendered.id:
-            attrs.append(f'id="{html.escape(rendered.id)}"')
-        if rendered.class_:
-            attrs.append(f'class="{html.escape(rendered.class_)}"')
-        if rendered.type:
-            attrs.append(f'type="{html.escape(rendered.type)}"')
-        if rendered.disabled:
-            attrs.append("disabled")
-
-        attrs_str = " " + " ".join(attrs) if attrs else ""
-        children_html = "".join(child.render_html() for child in rendered.children)
-        return f"<{rendered.tag}{attrs_str}>{children_html}</{rendered.tag}>"
-
 
 # Form Elements
 class Input(Component):
@@ -201,73 +605,17 @@ class Input(Component):
     disabled: bool | None = None
     tag: str = "input"
 
-    def render_html(self):
-        rendered = self.render()
-        attrs = []
-
-        if rendered.id:
-            attrs.append(f'id="{html.escape(rendered.id)}"')
-        if rendered.class_:
-            attrs.append(f'class="{html.escape(rendered.class_)}"')
-        if rendered.type:
-            attrs.append(f'type="{html.escape(rendered.type)}"')
-        if rendered.name:
-            attrs.append(f'name="{html.escape(rendered.name)}"')
-        if rendered.value:
-            attrs.append(f'value="{html.escape(rendered.value)}"')
-        if rendered.placeholder:
-            attrs.append(f'placeholder="{html.escape(rendered.placeholder)}"')
-        if rendered.required:
-            attrs.append("required")
-        if rendered.disabled:
-            attrs.append("disabled")
-
-        attrs_str = " " + " ".join(attrs) if attrs else ""
-        return f"<{rendered.tag}{attrs_str} />"
-
 
 class Form(Component):
     action: str | None = None
     method: str | None = None
     tag: str = "form"
 
-    def render_html(self):
-        rendered = self.render()
-        attrs = []
-
-        if rendered.id:
-            attrs.append(f'id="{html.escape(rendered.id)}"')
-        if rendered.class_:
-            attrs.append(f'class="{html.escape(rendered.class_)}"')
-        if rendered.action:
-            attrs.append(f'action="{html.escape(rendered.action)}"')
-        if rendered.method:
-            attrs.append(f'method="{html.escape(rendered.method)}"')
-
-        attrs_str = " " + " ".join(attrs) if attrs else ""
-        children_html = "".join(child.render_html() for child in rendered.children)
-        return f"<{rendered.tag}{attrs_str}>{children_html}</{rendered.tag}>"
-
 
 class Label(Component):
     for_: str | None = Field(None, alias="for")
     tag: str = "label"
 
-    def render_html(self):
-        rendered = self.render()
-        attrs = []
-
-        if rendered.id:
-            attrs.append(f'id="{html.escape(rendered.id)}"')
-        if rendered.class_:
-            attrs.append(f'class="{html.escape(rendered.class_)}"')
-        if rendered.for_:
-            attrs.append(f'for="{html.escape(rendered.for_)}"')
-
-        attrs_str = " " + " ".join(attrs) if attrs else ""
-        children_html = "".join(child.render_html() for child in rendered.children)
-        return f"<{rendered.tag}{attrs_str}>{children_html}</{rendered.tag}>"
-
 
 # List Elements
 class Ul(Component):
@@ -315,29 +663,11 @@ class Img(Component):
     height: str | None = None
     tag: str = "img"
 
-    def render_html(self):
-        rendered = self.render()
-        attrs = []
-
-        if rendered.id:
-            attrs.append(f'id="{html.escape(rendered.id)}"')
-        if rendered.class_:
-            attrs.append(f'class="{html.escape(rendered.class_)}"')
-        if rendered.src:
-            attrs.append(f'src="{validate_url(rendered.src)}"')
-        if rendered.alt:
-            attrs.append(f'alt="{html.escape(rendered.alt)}"')
-        if rendered.width:
-            attrs.append(f'width="{html.escape(rendered.width)}"')
-        if rendered.height:
-            attrs.append(f'height="{html.escape(rendered.height)}"')
-
-        attrs_str = " " + " ".join(attrs) if attrs else ""
-        return f"<{rendered.tag}{attrs_str} />"
-
 
 # Document Structure
 class Head(Component):
+    flush_after: ClassVar[bool] = True
+
     tag: str = "head"
 
 
@@ -352,27 +682,10 @@ class Meta(Component):
     http_equiv: str | None = Field(None, alias="http-equiv")
     tag: str = "meta"
 
-    def render_html(self):
-        attrs = []
-        if self.name:
-            attrs.append(f'name="{html.escape(self.name)}"')
-        if self.content:
-            attrs.append(f'content="{html.escape(self.content)}"')
-        if self.charset:
-            attrs.append(f'charset="{html.escape(self.charset)}"')
-        if self.http_equiv:
-            attrs.append(f'http-equiv="{html.escape(self.http_equiv)}"')
-        attrs_str = " " + " ".join(attrs) if attrs else ""
-        return f"<meta{attrs_str} />"
-
 
 class Title(Component):
     tag: str = "title"
 
-    def render_html(self):
-        children_html = "".join(child.render_html() for child in self.children)
-        return f"<title>{children_html}</title>"
-
 
 class Link(Component):
     href: str | None = None
@@ -380,29 +693,16 @@ class Link(Component):
     type: str | None = None
     tag: str = "link"
 
-    def render_html(self):
-        attrs = []
-        if self.href:
-            attrs.append(f'href="{validate_url(self.href)}"')
-        if self.rel:
-            attrs.append(f'rel="{html.escape(self.rel)}"')
-        if self.type:
-            attrs.append(f'type="{html.escape(self.type)}"')
-        attrs_str = " " + " ".join(attrs) if attrs else ""
-        return f"<link{attrs_str} />"
-
 
 class RawHTML(Component):
     html: str
 
-    def render_html(self):
-        return self.html
+    def html_parts(self, fmt: HTMLFormat, depth: int) -> list[HTMLPart]:
+        return [self.html]
 
 
 class HTML(Component):
-    lang: str = "en"
-    tag: str = "html"
+    doctype: ClassVar[str] = "<!doctype html>\n"
 
-    def render_html(self):
-        children_html = "".join(child.render_html() for child in self.children)
-        return f'<!doctype html>\n<html lang="{html.escape(self.lang)}">\n{children_html}\n</html>'
+    lang: str | None = "en"
+    tag: str = "html"
@@ -0,0 +1,189 @@
+"""
+Lists and tables that load their items a page at a time through HTMX.
+
+`LazyList` and `LazyTable` take a `source` instead of children. The source is
+either a page-fetch callable `fetch(offset, limit)` returning up to `limit`
+items, or any iterable. Rendering pulls only the first `page_size` items and
+ends with a sentinel row carrying `hx-get` and `hx-trigger="revealed"`, the same
+pattern `URLEmbedPreprocessor` uses for `/_/` assets. When the sentinel scrolls
+into view, HTMX requests `/_/lazy/<key>?offset=<n>` from `lazy_router` and
+swaps the sentinel (`outerHTML`) for the next page and a new sentinel. The
+first paint never waits for the whole collection, and a fetch callable is only
+ever asked for one page at a time.
+
+Each page fetches one item more than it shows, so a sentinel is only emitted
+when there is more to load. Items that are components pass through unchanged.
+Other items are wrapped: in `LazyList` each one becomes an `Li` holding its
+text, and in `LazyTable` each one is a sequence of cell values that becomes a
+`Tr` of `Td`s. Sources register themselves in `lazy_sources` when they render;
+there is no per-component route to declare.
+
+Module-level fetch functions are keyed by their qualified name plus a digest of
+the collection's class and settings (page size, headers, attributes), so two
+collections over the same function never answer for each other, and rendering
+the same collection again reuses its key. A key only resolves in a process
+that has rendered its collection: behind several workers, a sentinel request
+that lands on another process gets a 404. Everything else (lambdas, closures,
+iterables) gets a random key in a registry bounded to `LAZY_SOURCE_LIMIT`
+entries, oldest evicted first. An iterable is consumed in order as pages are
+requested, and the items pulled so far are kept with its key, so any `offset`
+(a retried request, a second visitor of a cached page) is answered from that
+list and only pages past its end pull more.
+"""
+
+import hashlib
+import secrets
+import threading
+from abc import abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from itertools import islice
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import HTMLResponse
+from pydantic import SkipValidation
+
+from colgandev.html.html_components import (
+    Component,
+    Fragment,
+    HTMLFormat,
+    HTMLPart,
+    Li,
+    Tbody,
+    Td,
+    Th,
+    Thead,
+    Tr,
+    render,
+)
+
+LAZY_PAGE_SIZE = 50
+
+LAZY_SOURCE_LIMIT = 1024
+
+LAZY_PATH = "/_/lazy"
+
+type PageFetcher = Callable[[int, int], Iterable[object]]
+
+
+@dataclass(slots=True)
+class LazySource:
+    collection: "LazyCollection"
+    key: str
+    iterator: Iterator[object] | None = None
+    pulled: list[object] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def page(self, offset: int) -> list[Component]:
+        collection = self.collection
+        size = collection.page_size
+        if self.iterator is None:
+            items = list(collection.source(offset, size + 1))
+        else:
+            with self.lock:
+                end = offset + size + 1
+                if len(self.pulled) < end:
+                    self.pulled += islice(self.iterator, end - len(self.pulled))
+                items = self.pulled[offset:end]
+        rows = [collection.item(item) for item in items[:size]]
+        if len(items) > size:
+            rows.append(collection.sentinel(f"{LAZY_PATH}/{self.key}?offset={offset + size}"))
+        return rows
+
+
+class LazySources:
+    def __init__(self, maxsize: int = LAZY_SOURCE_LIMIT):
+        self.maxsize = maxsize
+        self.named: dict[str, LazySource] = {}
+        self.entries: OrderedDict[str, LazySource] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.named) + len(self.entries)
+
+    def get(self, key: str) -> LazySource | None:
+        with self.lock:
+            return self.named.get(key) or self.entries.get(key)
+
+    def register(self, collection: "LazyCollection") -> LazySource:
+        source = collection.source
+        name = getattr(source, "__qualname__", "")
+        if callable(source) and name and "<" not in name:
+            cls = type(collection)
+            settings = repr((cls.__module__, cls.__qualname__, collection.model_dump(exclude={"source", "children"})))
+            key = f"{source.__module__}.{name}.{hashlib.blake2b(settings.encode(), digest_size=6).hexdigest()}"
+            with self.lock:
+                self.named[key] = LazySource(collection, key)
+                return self.named[key]
+
+        key = secrets.token_urlsafe(12)
+        iterator = None if callable(source) else iter(source)
+        with self.lock:
+            self.entries[key] = LazySource(collection, key, iterator)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+            return self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.named.clear()
+            self.entries.clear()
+
+
+lazy_sources = LazySources()
+
+
+class LazyCollection(Component):
+    source: SkipValidation[PageFetcher | Iterable[object]]
+    page_size: int = LAZY_PAGE_SIZE
+    loading: str = "Loading…"
+
+    @abstractmethod
+    def item(self, item: object) -> Component: ...
+
+    @abstractmethod
+    def sentinel(self, url: str) -> Component: ...
+
+    def wrap(self, rows: list[Component]) -> list[Component]:
+        return rows
+
+    def html_parts(self, fmt: HTMLFormat, depth: int) -> list[HTMLPart]:
+        rows = lazy_sources.register(self).page(0)
+        return Component.html_parts(self.model_copy(update={"children": self.wrap(rows)}), fmt, depth)
+
+
+class LazyList(LazyCollection):
+    tag: str = "ul"
+
+    def item(self, item: object) -> Component:
+        return item if isinstance(item, Component) else Li()(str(item))
+
+    def sentinel(self, url: str) -> Component:
+        return Li(hx_get=url, hx_trigger="revealed", hx_swap="outerHTML")(self.loading)
+
+
+class LazyTable(LazyCollection):
+    headers: tuple[str, ...] = ()
+    tag: str = "table"
+
+    def item(self, item: object) -> Component:
+        return item if isinstance(item, Component) else Tr()(*(Td()(str(value)) for value in item))
+
+    def sentinel(self, url: str) -> Component:
+        return Tr(hx_get=url, hx_trigger="revealed", hx_swap="outerHTML")(Td()(self.loading))
+
+    def wrap(self, rows: list[Component]) -> list[Component]:
+        body = Tbody()(*rows)
+        return [Thead()(Tr()(*(Th()(header) for header in self.headers))), body] if self.headers else [body]
+
+
+lazy_router = APIRouter()
+
+
+@lazy_router.get(LAZY_PATH + "/{key}")
+def lazy_page(key: str, offset: int = Query(0, ge=0)) -> HTMLResponse:
+    source = lazy_sources.get(key)
+    if source is None:
+        raise HTTPException(status_code=404)
+    return render(Fragment()(*source.page(offset)))
@@ -0,0 +1,326 @@
+"""
+Optional render instrumentation exposed in Prometheus text format.
+
+`instrument(app)` does nothing unless the RENDER_METRICS setting is on, so a
+normal deployment runs the exact same functions as before, with no flag
+checks on any path. When it is on, `install()` wraps methods in place. It wraps
+`Component.__init__`, every `render()` and every `html_parts()` defined by a
+component class, including classes defined later, through
+`prepare_component_class`. It also wraps the top-level `write_parts` and
+`iter_parts` drivers. The wrappers feed plain counters and histograms:
+
+- per component class: instances constructed and construction seconds;
+  `render()` expansion seconds; nodes rendered, `html_parts` seconds
+  (including expansion, and a `Static` miss includes its subtree) and output
+  bytes in UTF-8. Only non-ASCII parts are encoded to count them.
+- per route: histograms of construction, expansion and whole-render seconds
+  per request, and totals of rendered nodes and response body bytes. A pure
+  ASGI middleware collects these into a per-request `RequestTotals` through a
+  ContextVar. It counts the body bytes as they pass through `send`, after any
+  compression, so streamed and cached pages count exactly. Once the body has
+  been sent, it labels the totals with the matched route's path template.
+
+`GET /_/metrics` returns everything in the Prometheus text exposition format.
+Updates take no locks: a rare increment lost to a race between worker
+threads is an acceptable price for counters this cheap. `uninstall()` restores
+the original methods.
+"""
+
+import functools
+import inspect
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import Callable, Iterator
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+
+from colgandev.html import html_components
+from colgandev.html.html_components import Component
+from colgandev.settings import RENDER_METRICS
+
+METRICS_PATH = "/_/metrics"
+
+SECONDS_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+
+def label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, label: str):
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.values: defaultdict[str, float] = defaultdict(int)
+
+    def inc(self, label: str, amount: float = 1):
+        self.values[label] += amount
+
+    def lines(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for label, value in sorted(self.values.items()):
+            yield f'{self.name}{{{self.label}="{label_value(label)}"}} {number(value)}'
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, label: str, buckets: tuple[float, ...] = SECONDS_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.buckets = buckets
+        self.counts: dict[str, list[int]] = {}
+        self.sums: defaultdict[str, float] = defaultdict(float)
+
+    def observe(self, label: str, value: float):
+        counts = self.counts.get(label)
+        if counts is None:
+            counts = self.counts.setdefault(label, [0] * (len(self.buckets) + 1))
+        counts[bisect_left(self.buckets, value)] += 1
+        self.sums[label] += value
+
+    def lines(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for label, counts in sorted(self.counts.items()):
+            selector = f'{self.label}="{label_value(label)}"'
+            cumulative = 0
+            for bound, count in zip((*map(str, self.buckets), "+Inf"), counts):
+                cumulative += count
+                yield f'{self.name}_bucket{{{selector},le="{bound}"}} {cumulative}'
+            yield f"{self.name}_sum{{{selector}}} {number(self.sums[label])}"
+            yield f"{self.name}_count{{{selector}}} {cumulative}"
+
+
+component_constructed = Counter(
+    "colgandev_component_constructed_total", "Component instances constructed.", "component"
+)
+component_construct_seconds = Counter(
+    "colgandev_component_construct_seconds_total", "Seconds spent constructing components.", "component"
+)
+component_expand_seconds = Counter(
+    "colgandev_component_expand_seconds_total", "Seconds spent in custom render() expansion.", "component"
+)
+component_rendered = Counter("colgandev_component_rendered_total", "Component nodes rendered.", "component")
+component_render_seconds = Counter(
+    "colgandev_component_render_seconds_total", "Seconds spent in html_parts, including expansion.", "component"
+)
+component_output_bytes = Counter(
+    "colgandev_component_output_bytes_total", "UTF-8 bytes of markup emitted by the component itself.", "component"
+)
+route_construct_seconds = Histogram(
+    "colgandev_route_construct_seconds", "Component construction seconds per request.", "route"
+)
+route_expand_seconds = Histogram("colgandev_route_expand_seconds", "render() expansion seconds per request.", "route")
+route_render_seconds = Histogram("colgandev_route_render_seconds", "HTML rendering seconds per request.", "route")
+route_nodes = Counter("colgandev_route_nodes_total", "Component nodes rendered.", "route")
+route_output_bytes = Counter("colgandev_route_output_bytes_total", "Response body bytes sent.", "route")
+
+metrics = (
+    component_constructed,
+    component_construct_seconds,
+    component_expand_seconds,
+    component_rendered,
+    component_render_seconds,
+    component_output_bytes,
+    route_construct_seconds,
+    route_expand_seconds,
+    route_render_seconds,
+    route_nodes,
+    route_output_bytes,
+)
+
+
+def exposition() -> str:
+    return "\n".join(line for metric in metrics for line in metric.lines()) + "\n"
+
+
+@dataclass(slots=True)
+class RequestTotals:
+    construct: float = 0.0
+    expand: float = 0.0
+    render: float = 0.0
+    nodes: int = 0
+    output_bytes: int = 0
+
+
+request_totals: ContextVar[RequestTotals | None] = ContextVar("request_totals", default=None)
+
+
+def encoded_length(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode())
+
+
+def timed_init(init: Callable) -> Callable:
+    @functools.wraps(init)
+    def wrapper(self, /, **data):
+        start = time.perf_counter()
+        init(self, **data)
+        elapsed = time.perf_counter() - start
+        name = type(self).__name__
+        component_constructed.inc(name)
+        component_construct_seconds.inc(name, elapsed)
+        if (totals := request_totals.get()) is not None:
+            totals.construct += elapsed
+
+    return wrapper
+
+
+def timed_render(render: Callable) -> Callable:
+    @functools.wraps(render)
+    def wrapper(self):
+        start = time.perf_counter()
+        rendered = render(self)
+        elapsed = time.perf_counter() - start
+        component_expand_seconds.inc(type(self).__name__, elapsed)
+        if (totals := request_totals.get()) is not None:
+            totals.expand += elapsed
+        return rendered
+
+    return wrapper
+
+
+def timed_html_parts(html_parts: Callable) -> Callable:
+    @functools.wraps(html_parts)
+    def wrapper(self, fmt, depth):
+        start = time.perf_counter()
+        parts = html_parts(self, fmt, depth)
+        elapsed = time.perf_counter() - start
+        name = type(self).__name__
+        component_rendered.inc(name)
+        component_render_seconds.inc(name, elapsed)
+        component_output_bytes.inc(name, sum(encoded_length(part) for part in parts if type(part) is str))
+        if (totals := request_totals.get()) is not None:
+            totals.nodes += 1
+        return parts
+
+    return wrapper
+
+
+def timed_write_parts(write_parts: Callable) -> Callable:
+    @functools.wraps(write_parts)
+    def wrapper(out, parts):
+        start = time.perf_counter()
+        write_parts(out, parts)
+        elapsed = time.perf_counter() - start
+        if (totals := request_totals.get()) is not None:
+            totals.render += elapsed
+
+    return wrapper
+
+
+def timed_iter_parts(iter_parts: Callable) -> Callable:
+    @functools.wraps(iter_parts)
+    def wrapper(parts):
+        chunks = iter_parts(parts)
+        totals = request_totals.get()
+        while True:
+            start = time.perf_counter()
+            chunk = next(chunks, None)
+            if totals is not None:
+                totals.render += time.perf_counter() - start
+            if chunk is None:
+                return
+            yield chunk
+
+    return wrapper
+
+
+METHOD_WRAPPERS = {"render": timed_render, "html_parts": timed_html_parts}
+
+originals: list[tuple[object, str, object]] = []
+
+
+def replace(owner: object, name: str, wrap: Callable):
+    original = vars(owner)[name]
+    originals.append((owner, name, original))
+    setattr(owner, name, wrap(original))
+
+
+def instrument_class(cls: type[Component]):
+    for name, wrap in METHOD_WRAPPERS.items():
+        method = cls.__dict__.get(name)
+        if method is Component.render or method is None or inspect.iscoroutinefunction(method):
+            continue
+        replace(cls, name, wrap)
+
+
+def all_subclasses(cls: type) -> Iterator[type]:
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from all_subclasses(subclass)
+
+
+def install():
+    if originals:
+        return
+    replace(Component, "__init__", timed_init)
+    for cls in (Component, *all_subclasses(Component)):
+        instrument_class(cls)
+    replace(html_components, "write_parts", timed_write_parts)
+    replace(html_components, "iter_parts", timed_iter_parts)
+
+    prepare_component_class = html_components.prepare_component_class
+
+    def prepare_and_instrument(cls: type[Component]):
+        prepare_component_class(cls)
+        instrument_class(cls)
+
+    originals.append((html_components, "prepare_component_class", prepare_component_class))
+    html_components.prepare_component_class = prepare_and_instrument
+
+
+def uninstall():
+    while originals:
+        owner, name, original = originals.pop()
+        setattr(owner, name, original)
+
+
+class RenderMetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        totals = RequestTotals()
+        token = request_totals.set(totals)
+
+        async def counting_send(message):
+            if message["type"] == "http.response.body":
+                totals.output_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, counting_send)
+        finally:
+            request_totals.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            route_construct_seconds.observe(route, totals.construct)
+            route_expand_seconds.observe(route, totals.expand)
+            route_render_seconds.observe(route, totals.render)
+            route_nodes.inc(route, totals.nodes)
+            route_output_bytes.inc(route, totals.output_bytes)
+
+
+async def metrics_endpoint() -> PlainTextResponse:
+    return PlainTextResponse(exposition(), media_type="text/plain; version=0.0.4")
+
+
+def instrument(app: FastAPI, enabled: bool = RENDER_METRICS):
+    if not enabled:
+        return
+    install()
+    app.add_middleware(RenderMetricsMiddleware)
+    app.add_api_route(METRICS_PATH, metrics_endpoint, include_in_schema=False)
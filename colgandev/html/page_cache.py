@@ -0,0 +1,224 @@
+"""
+Whole-page response cache with strong ETags and conditional GET support.
+
+`cached_page()` wraps an async route that takes a `request: Request` and
+returns a rendered HTML response. The first hit runs the route and stores the
+body in `page_cache`, keyed by the URL path, the query string, and the values
+of any request headers listed in `vary`. A `StreamingResponse` is passed
+through to the client as it is produced (so `render_stream` still sends the
+head first) and copied into the cache once it has been sent in full; that
+first response carries no ETag. The body's SHA-256 gives a strong ETag. Every later hit is a dictionary
+lookup: a request whose `If-None-Match` matches gets an empty 304, and anything
+else gets the stored bytes with the ETag attached. Only 200 responses are
+cached.
+
+Storing a page also compresses it once into gzip and deflate variants (bodies
+under `COMPRESSION_MIN_SIZE` are left alone). Each hit picks the variant the
+client's `Accept-Encoding` prefers, honouring q-values, and sends it with
+`Content-Encoding` and `Vary: Accept-Encoding`, so repeated hits never compress
+the same bytes again. Each variant has its own strong ETag, as required for
+distinct representations. `compressed_variants` is also what `generate_site`
+uses to write `.gz` and `.deflate` files next to each static page.
+
+Pages that are constant, or have a small known set of parameters, can skip
+even the first render: `@precompile(path, params)` registers a page builder,
+and `compile_pages()` (called from the app's lifespan startup) renders every
+registration once, encodes it, and seeds `page_cache` under the key
+`cached_page()` will look up for that path with no query string. Requests then
+never run component code. The time and size of each page is logged so
+deploy-time cost stays visible. Precompiled routes must still be wrapped in
+`cached_page()` without `vary`, which also covers an evicted page by rendering
+it on demand.
+
+The cache is an LRU bounded by the total size of the stored bodies, variants
+included (`PAGE_CACHE_MAX_BYTES`); pages bigger than the whole budget are
+served but not stored. Cached pages never expire on their own, so routes whose output depends
+on anything other than the key must not use the decorator, or must call
+`page_cache.clear()` when that input changes.
+"""
+
+import functools
+import gzip
+import hashlib
+import logging
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+
+from colgandev.html.html_components import DEFAULT_FORMAT, Component
+from colgandev.settings import PAGE_CACHE_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+
+COMPRESSION_MIN_SIZE = 500
+
+COMPRESSORS = {
+    "gzip": lambda body: gzip.compress(body, mtime=0),
+    "deflate": zlib.compress,
+}
+
+
+def compressed_variants(body: bytes) -> dict[str, bytes]:
+    if len(body) < COMPRESSION_MIN_SIZE:
+        return {}
+    return {encoding: compress(body) for encoding, compress in COMPRESSORS.items()}
+
+
+def preferred_encoding(accept_encoding: str | None, available: Iterable[str]) -> str | None:
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, parameters = item.strip().lower().partition(";")
+        name, _, value = parameters.strip().partition("=")
+        try:
+            weights[coding.strip()] = float(value) if name.strip() == "q" else 1.0
+        except ValueError:
+            continue
+    wildcard = weights.get("*", 0.0)
+    ranked = [(weights.get(encoding, wildcard), encoding) for encoding in available]
+    ranked = [item for item in ranked if item[0] > 0]
+    return max(ranked, key=lambda item: item[0])[1] if ranked else None
+
+
+def strong_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+@dataclass(frozen=True, slots=True)
+class CachedPage:
+    body: bytes
+    etag: str
+    media_type: str
+    variants: dict[str, bytes]
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(map(len, self.variants.values()))
+
+    def matches(self, if_none_match: str | None, etag: str) -> bool:
+        if not if_none_match:
+            return False
+        candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+        return "*" in candidates or etag in candidates
+
+    def respond(self, request: Request, vary: Iterable[str] = ()) -> Response:
+        encoding = preferred_encoding(request.headers.get("accept-encoding"), self.variants)
+        etag = f'{self.etag[:-1]}-{encoding}"' if encoding else self.etag
+        headers = {"ETag": etag, "Vary": ", ".join(["Accept-Encoding", *vary])}
+        if self.matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            return Response(self.variants[encoding], media_type=self.media_type, headers=headers)
+        return Response(self.body, media_type=self.media_type, headers=headers)
+
+
+class PageCache:
+    def __init__(self, max_bytes: int = PAGE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries: OrderedDict[tuple, CachedPage] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: tuple) -> CachedPage | None:
+        with self.lock:
+            page = self.entries.get(key)
+            if page is not None:
+                self.entries.move_to_end(key)
+            return page
+
+    def store(self, key: tuple, body: bytes, media_type: str) -> CachedPage:
+        page = CachedPage(body=body, etag=strong_etag(body), media_type=media_type, variants=compressed_variants(body))
+        if page.size > self.max_bytes:
+            return page
+
+        with self.lock:
+            if (previous := self.entries.pop(key, None)) is not None:
+                self.size -= previous.size
+            self.entries[key] = page
+            self.size += page.size
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= evicted.size
+        return page
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+page_cache = PageCache()
+
+
+def stream_into_cache(response: StreamingResponse, cache: PageCache, key: tuple) -> StreamingResponse:
+    chunks = response.body_iterator
+
+    async def copying():
+        body = []
+        async for chunk in chunks:
+            chunk = chunk if isinstance(chunk, bytes) else chunk.encode(response.charset)
+            body.append(chunk)
+            yield chunk
+        cache.store(key, b"".join(body), response.media_type or "text/html")
+
+    response.body_iterator = copying()
+    return response
+
+
+def cached_page(vary: Iterable[str] = (), cache: PageCache = page_cache):
+    vary = tuple(header.lower() for header in vary)
+
+    def decorator(view: Callable[..., Awaitable[Response]]):
+        @functools.wraps(view)
+        async def wrapper(*args, request: Request, **kwargs):
+            key = (request.url.path, request.url.query, *(request.headers.get(header) for header in vary))
+            page = cache.get(key)
+            if page is None:
+                response = await view(*args, request=request, **kwargs)
+                if response.status_code != 200:
+                    return response
+                if isinstance(response, StreamingResponse):
+                    response.headers["Vary"] = ", ".join(["Accept-Encoding", *vary])
+                    return stream_into_cache(response, cache, key)
+                page = cache.store(key, response.body, response.media_type or "text/html")
+            return page.respond(request, vary)
+
+        return wrapper
+
+    return decorator
+
+
+precompiled_pages: list[tuple[str, Callable[..., Component], tuple[dict, ...]]] = []
+
+
+def precompile(path: str, params: Iterable[dict] = ({},)):
+    def decorator(builder: Callable[..., Component]):
+        precompiled_pages.append((path, builder, tuple(params)))
+        return builder
+
+    return decorator
+
+
+def compile_pages(cache: PageCache = page_cache) -> dict[str, float]:
+    timings = {}
+    for path, builder, params in precompiled_pages:
+        for kwargs in params:
+            url = path.format(**kwargs)
+            start = time.perf_counter()
+            body = builder(**kwargs).render_html(DEFAULT_FORMAT).encode()
+            cache.store((url, ""), body, "text/html")
+            timings[url] = time.perf_counter() - start
+            logger.info("Precompiled %s in %.1f ms (%d bytes)", url, timings[url] * 1000, len(body))
+    return timings
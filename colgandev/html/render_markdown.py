@@ -1,9 +1,89 @@
+"""
+Markdown to HTML for zettel bodies, with URL embeds and external-link marking.
+
+`URLEmbedExtension` turns lines holding only a URL into embeds (YouTube iframes,
+HTMX placeholders for `/_/` assets) before Markdown sees them, and marks
+absolute links to open in a new tab. `convert()` is the entry point, and the
+`render_markdown` template filter wraps it.
+
+Embeds come from `embed_providers`, a registry filled with
+`@register_embed(name, hint, pattern)`. The pattern matches a whole URL, and
+the decorated function turns a matching URL into HTML. The preprocessor first
+checks the joined document for every provider's `hint` substring, so prose
+with no candidate URL returns untouched without a per-line loop. Otherwise each
+line is `fullmatch`ed once against a single pattern combining every provider
+(compiled once per registry change), and the named group that matched picks
+the provider. Other URL-only lines are left for Markdown to link. Registering a
+provider clears the conversion caches. Register at import time so that
+`convert_many()` workers, which import this module afresh, see the same
+providers. With the INLINE_EMBEDS setting on, the filter inlines small `/_/`
+embeds server-side (see `colgandev.html.embeds`) instead of leaving them all to
+HTMX.
+
+Conversions are cached in `markdown_cache`, a bounded LRU keyed by a BLAKE2
+digest of the content and of `MARKDOWN_CONFIG_KEY`. That key covers the
+Markdown version, the extensions and their configs, so changing any of them
+misses instead of serving stale HTML. A page showing the same bodies again pays
+one hash per body. A `markdown.Markdown` instance keeps per-document state
+(reference links, footnotes, stash) and is not safe to share, so each thread
+lazily builds its own in `thread_markdown()` and `reset()`s it after every
+document. A threaded server can therefore convert in parallel. A miss converts
+outside the cache lock, so two threads racing on the same new body both
+convert it and store identical HTML.
+
+Documents of `INCREMENTAL_MARKDOWN_SIZE` characters or more are converted
+block by block, so editing one paragraph of a long note re-renders only that
+paragraph. `markdown_blocks()` splits the text at blank lines into top-level
+blocks that render the same on their own as they do in place. It never
+separates a fenced code block (found with the `fenced_code` extension's own
+pattern), indented continuation lines, or consecutive list and quote blocks
+that Markdown would merge into one element. Each block's HTML is cached in
+`block_cache` under its own digest. Link reference definitions are collected
+from the whole document and seeded into each block's conversion, and their
+digest is part of the block key. Blocks holding only definitions render to
+nothing and are left out, so they never end the list or quote around them. A document with raw HTML lines (which
+Markdown may parse across blank lines) or with conflicting reference
+definitions is converted whole. The stitched result matches whole-document
+conversion except that `/_/` and YouTube embeds are followed by one newline
+instead of a blank line.
+
+`convert_many()` converts a batch, such as every note on an index page or in a
+site build, and returns the HTML in input order. Cached documents are answered
+in-process, and duplicates are converted once. Batches of at least
+`BATCH_POOL_THRESHOLD` misses are split into about `BATCH_CHUNKS_PER_WORKER`
+chunks per requested worker (one per core by default) and mapped over a
+shared `ProcessPoolExecutor` of `BATCH_WORKERS` processes. The pool is created
+on the first large batch, reused by every later one, and shut down at exit.
+Its initializer builds each worker's Markdown instance, with its
+`URLEmbedExtension`, once for the life of the worker. Workers are started from
+a fork server, which is safe even when called from a threaded web server. The
+results are stored in the caller's `markdown_cache`. Smaller batches aren't
+worth handing to other processes, so they are converted in-process.
+"""
+
+import atexit
+import functools
+import hashlib
+import multiprocessing
+import os
 import re
+import threading
+from bisect import bisect_right
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import chain
 
 import markdown
 from django import template
 from django.utils.html import escape
 from django.utils.safestring import mark_safe
+from markdown.blockprocessors import ReferenceProcessor
+from markdown.extensions.fenced_code import FencedBlockPreprocessor
+
+from colgandev.html.embeds import inline_embeds
+from colgandev.html.static import FragmentCache
+from colgandev.settings import INLINE_EMBEDS
 
 register = template.Library()
 
@@ -15,44 +95,46 @@ class URLEmbedExtension(markdown.Extension):
         md.treeprocessors.register(ExternalLinksTreeProcessor(md), "external_links", 0)
 
 
+@dataclass(frozen=True, slots=True)
+class EmbedProvider:
+    hint: str
+    pattern: str
+    render: Callable[[str], str]
+
+
+embed_providers: dict[str, EmbedProvider] = {}
+
+
+def register_embed(name: str, hint: str, pattern: str):
+    def decorator(render: Callable[[str], str]):
+        embed_providers[name] = EmbedProvider(hint, pattern, render)
+        embed_pattern.cache_clear()
+        markdown_cache.clear()
+        block_cache.clear()
+        return render
+
+    return decorator
+
+
+@functools.cache
+def embed_pattern() -> re.Pattern:
+    providers = "|".join(f"(?P<{name}>{provider.pattern})" for name, provider in embed_providers.items())
+    return re.compile(rf"\s*(?:{providers})\s*")
+
+
 class URLEmbedPreprocessor(markdown.preprocessors.Preprocessor):
     def run(self, lines):
+        text = "\n".join(lines)
+        if not any(provider.hint in text for provider in embed_providers.values()):
+            return lines
+
+        match_line = embed_pattern().fullmatch
         processed_lines = []
         for line in lines:
-            stripped = line.strip()
-            if not stripped:
-                processed_lines.append(line)
-                continue
-
-            # Check if line contains only a URL
-            url_pattern = r"^(https?://[^\s]+|/[^\s]*)$"
-            if not re.match(url_pattern, stripped):
+            if match := match_line(line):
+                processed_lines.append(embed_providers[match.lastgroup].render(match.group(match.lastgroup)))
+            else:
                 processed_lines.append(line)
-                continue
-
-            # YouTube URLs - convert to iframe embed
-            youtube_pattern = (
-                r"(?:https?://)?(?:www\.)?(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/embed/)([a-zA-Z0-9_-]+)"
-            )
-            youtube_match = re.match(youtube_pattern, stripped)
-            if youtube_match:
-                video_id = escape(youtube_match.group(1))
-                embed_html = (
-                    f'<iframe width="560" height="315" src="https://www.youtube.com/embed/{video_id}" '
-                    f'frameborder="0" allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture" allowfullscreen></iframe>'
-                )
-                processed_lines.append(embed_html)
-                continue
-
-            # Asset URLs - convert to HTMX
-            if stripped.startswith("/_/"):
-                escaped_url = escape(stripped)
-                processed_lines.append(f'<div hx-get="{escaped_url}" hx-trigger="revealed"></div>')
-                continue
-
-            # Let other URLs be processed normally by markdown (they'll get target="_blank" from ExternalLinksTreeProcessor)
-            processed_lines.append(line)
-
         return processed_lines
 
 
@@ -65,15 +147,209 @@ class ExternalLinksTreeProcessor(markdown.treeprocessors.Treeprocessor):
                 link.set("rel", "noopener noreferrer")
 
 
-md = markdown.Markdown(
-    extensions=["fenced_code", URLEmbedExtension()],
-    extension_configs={
-        "fenced_code": {
-            "lang_prefix": "language-",
-        }
-    },
+MARKDOWN_EXTENSION_CONFIGS = {
+    "fenced_code": {
+        "lang_prefix": "language-",
+    }
+}
+
+MARKDOWN_CACHE_SIZE = 4096
+
+MARKDOWN_BLOCK_CACHE_SIZE = 16384
+
+INCREMENTAL_MARKDOWN_SIZE = 20_000
+
+BATCH_POOL_THRESHOLD = 64
+
+BATCH_CHUNKS_PER_WORKER = 4
+
+BATCH_WORKERS = os.process_cpu_count() or 1
+
+FENCED_BLOCK = FencedBlockPreprocessor.FENCED_BLOCK_RE
+
+REFERENCE = ReferenceProcessor.RE
+
+LIST_ITEM = re.compile(r"^ {0,3}(?:[*+-]|\d+\.)[ \t]", re.MULTILINE)
+
+BLOCK_QUOTE = re.compile(r"^ {0,3}>", re.MULTILINE)
+
+YOUTUBE_URL = re.compile(
+    r"https?://(?:www\.)?(?:youtube\.com/watch\?v=|youtu\.be/|youtube\.com/embed/)(?P<video_id>[a-zA-Z0-9_-]+)\S*"
 )
 
+RAW_HTML = re.compile(r"^ {0,3}<", re.MULTILINE)
+
+BLANK_LINES = re.compile(r"\n(?: *\n)+")
+
+
+def content_hash(value: str) -> bytes:
+    return hashlib.blake2b(value.encode(), digest_size=16).digest()
+
+
+MARKDOWN_CONFIG_KEY = content_hash(repr((markdown.__version__, "fenced_code", "url_embed", MARKDOWN_EXTENSION_CONFIGS)))
+
+markdown_cache = FragmentCache(MARKDOWN_CACHE_SIZE)
+
+block_cache = FragmentCache(MARKDOWN_BLOCK_CACHE_SIZE)
+
+thread_state = threading.local()
+
+
+@register_embed("youtube", "youtu", YOUTUBE_URL.pattern)
+def youtube_embed(url: str) -> str:
+    video_id = escape(YOUTUBE_URL.match(url).group("video_id"))
+    return (
+        f'<iframe width="560" height="315" src="https://www.youtube.com/embed/{video_id}" '
+        f'frameborder="0" allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture" allowfullscreen></iframe>'
+    )
+
+
+@register_embed("asset", "/_/", r"/_/\S*")
+def asset_embed(url: str) -> str:
+    return f'<div hx-get="{escape(url)}" hx-trigger="revealed"></div>'
+
+
+def build_markdown() -> markdown.Markdown:
+    return markdown.Markdown(
+        extensions=["fenced_code", URLEmbedExtension()], extension_configs=MARKDOWN_EXTENSION_CONFIGS
+    )
+
+
+def thread_markdown() -> markdown.Markdown:
+    md = getattr(thread_state, "md", None)
+    if md is None:
+        md = thread_state.md = build_markdown()
+    return md
+
+
+def convert_text(value: str, references: dict[str, tuple[str, str | None]] | None = None) -> str:
+    md = thread_markdown()
+    if references:
+        md.references.update(references)
+    try:
+        return md.convert(value)
+    finally:
+        md.reset()
+
+
+def in_fence(fences: list[tuple[int, int]], starts: list[int], position: int) -> bool:
+    index = bisect_right(starts, position) - 1
+    return index >= 0 and position < fences[index][1]
+
+
+def continues(value: str, block: list[int], start: int) -> bool:
+    if value[start] == " ":
+        return True
+    if LIST_ITEM.match(value, start):
+        return LIST_ITEM.search(value, *block) is not None
+    if BLOCK_QUOTE.match(value, start):
+        return BLOCK_QUOTE.search(value, *block) is not None
+    return False
+
+
+def markdown_blocks(value: str) -> tuple[list[str], dict[str, tuple[str, str | None]]] | None:
+    value = value.replace("\r\n", "\n").replace("\r", "\n").expandtabs(4)
+    if (end := value.find("\n", len(value.rstrip()))) >= 0:
+        value = value[:end]
+    fences = [match.span() for match in FENCED_BLOCK.finditer(value)]
+    starts = [start for start, _ in fences]
+    if any(not in_fence(fences, starts, match.start()) for match in RAW_HTML.finditer(value)):
+        return None
+
+    references = {}
+    for match in REFERENCE.finditer(value):
+        if in_fence(fences, starts, match.start()):
+            continue
+        reference = (match.group(2).lstrip("<").rstrip(">"), match.group(5) or match.group(6))
+        if references.setdefault(match.group(1).strip().lower(), reference) != reference:
+            return None
+
+    blocks: list[list[int]] = []
+    fence_end = 0
+    next_fence = 0
+    start = 0
+    for separator in (*BLANK_LINES.finditer(value), None):
+        end = len(value) if separator is None else separator.start()
+        if value[start:end].strip():
+            if blocks and (start < fence_end or continues(value, blocks[-1], start)):
+                blocks[-1][1] = end
+            elif REFERENCE.sub("", value[start:end]).strip():
+                blocks.append([start, end])
+            while next_fence < len(fences) and fences[next_fence][0] < end:
+                fence_end = max(fence_end, fences[next_fence][1])
+                next_fence += 1
+        if separator is not None:
+            start = separator.end()
+    return [value[start:end] for start, end in blocks], references
+
+
+def convert_blocks(blocks: list[str], references: dict[str, tuple[str, str | None]]) -> str:
+    references_key = content_hash(repr(sorted(references.items()))) if references else b""
+    parts = []
+    for block in blocks:
+        key = (content_hash(block), references_key, MARKDOWN_CONFIG_KEY)
+        html = block_cache.get(key)
+        if html is None:
+            html = convert_text(block, references)
+            block_cache.set(key, html)
+        if html:
+            parts.append(html)
+    return "\n".join(parts)
+
+
+def convert(value: str) -> str:
+    key = (content_hash(value), MARKDOWN_CONFIG_KEY)
+    html = markdown_cache.get(key)
+    if html is None:
+        split = markdown_blocks(value) if len(value) >= INCREMENTAL_MARKDOWN_SIZE else None
+        html = convert_text(value) if split is None else convert_blocks(*split)
+        markdown_cache.set(key, html)
+    return html
+
+
+def init_worker():
+    thread_state.md = build_markdown()
+
+
+def convert_chunk(values: list[str]) -> list[str]:
+    return [convert(value) for value in values]
+
+
+batch_pool: ProcessPoolExecutor | None = None
+
+batch_pool_lock = threading.Lock()
+
+
+def get_batch_pool() -> ProcessPoolExecutor:
+    global batch_pool
+    with batch_pool_lock:
+        if batch_pool is None:
+            context = multiprocessing.get_context("forkserver")
+            batch_pool = ProcessPoolExecutor(BATCH_WORKERS, mp_context=context, initializer=init_worker)
+            atexit.register(batch_pool.shutdown)
+        return batch_pool
+
+
+def convert_many(values: Iterable[str], workers: int | None = None, chunksize: int | None = None) -> list[str]:
+    values = list(values)
+    keys = [(content_hash(value), MARKDOWN_CONFIG_KEY) for value in values]
+    cached = [markdown_cache.get(key) for key in keys]
+    misses = {key: value for key, value, html in zip(keys, values, cached) if html is None}
+    pending = list(misses.values())
+
+    workers = min(workers or BATCH_WORKERS, len(pending))
+    if workers <= 1 or len(pending) < BATCH_POOL_THRESHOLD:
+        converted = convert_chunk(pending)
+    else:
+        chunksize = chunksize or -(-len(pending) // (workers * BATCH_CHUNKS_PER_WORKER))
+        chunks = [pending[start : start + chunksize] for start in range(0, len(pending), chunksize)]
+        converted = list(chain.from_iterable(get_batch_pool().map(convert_chunk, chunks)))
+        for key, html in zip(misses, converted):
+            markdown_cache.set(key, html)
+
+    fresh = dict(zip(misses, converted))
+    return [fresh[key] if html is None else html for key, html in zip(keys, cached)]
+
 
 @register.filter
 def render_markdown(value):
@@ -83,4 +359,5 @@ def render_markdown(value):
     if not value:
         return ""
 
-    return mark_safe(md.convert(value))
+    html = convert(value)
+    return mark_safe(inline_embeds(html) if INLINE_EMBEDS else html)
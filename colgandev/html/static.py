@@ -0,0 +1,67 @@
+"""
+Pre-rendered HTML for component subtrees that never change between requests.
+
+Wrapping children in `Static` marks them as having no dynamic inputs. The first
+render stores their HTML in `fragment_cache`, keyed by the subtree's
+`structural_key` (every class, field value and child count in document order,
+so two independently built but identical subtrees share one entry) plus the output format and
+indentation depth. Later renders compute the key and return the stored string
+without expanding custom components, escaping attributes or formatting. The
+cache is a bounded LRU; `fragment_cache.clear()` evicts everything, e.g. after
+changing components during development. A frozen `Static` (see `freeze()`) is
+its own key: its cached hash and identity replace the walk over the subtree.
+
+Only wrap subtrees whose content is really constant: anything not captured in
+the structural key (such as state read inside a custom `render()`) is frozen
+at first render.
+"""
+
+import threading
+from collections import OrderedDict
+
+from colgandev.html.html_components import Fragment, HTMLFormat, HTMLPart, is_frozen, write_parts
+
+FRAGMENT_CACHE_SIZE = 1024
+
+
+class FragmentCache:
+    def __init__(self, maxsize: int = FRAGMENT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries: OrderedDict[tuple, str] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: tuple) -> str | None:
+        with self.lock:
+            html = self.entries.get(key)
+            if html is not None:
+                self.entries.move_to_end(key)
+            return html
+
+    def set(self, key: tuple, html: str):
+        with self.lock:
+            self.entries[key] = html
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+fragment_cache = FragmentCache()
+
+
+class Static(Fragment):
+    def html_parts(self, fmt: HTMLFormat, depth: int) -> list[HTMLPart]:
+        key = (self if is_frozen(self) else self.structural_key(), fmt, depth)
+        html = fragment_cache.get(key)
+        if html is None:
+            buffer = []
+            write_parts(buffer, super().html_parts(fmt, depth))
+            html = "".join(buffer)
+            fragment_cache.set(key, html)
+        return [html]
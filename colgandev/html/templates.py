@@ -0,0 +1,142 @@
+"""
+Wrapper components precompiled into static HTML with named slots.
+
+A `Templated` component declares which of its fields are holes
+(`template_slots`). Its children are always a hole. The first time an instance
+renders with a given class, output format, depth and set of non-slot field
+values, its `render()` is expanded once with NUL-delimited markers in place of
+the slot values, and a `ChildrenSlot` placeholder in place of its children.
+The placeholder renders as a marker and records the format and depth it was
+rendered at. Children inside a `<pre>` are therefore minified as usual, and
+children nested deeper are indented to match. The resulting HTML is split into
+a `Template`: static strings around named slots. Every later render writes
+those strings and only escapes the slot values and renders the children in
+between, at the recorded format and depth. A `Layout` therefore costs two
+escapes plus its body instead of rebuilding and escaping the whole `<head>`.
+The output is byte-identical to the expanded render. A wrapper that places its
+children more than once is always expanded normally, and so is one with an
+empty slot value, since elements leave out empty attributes that the template
+would keep (`Layout(description="")` has no `content` attribute).
+
+Markers survive escaping, so slots work in attribute values (`Meta(content=
+self.description)`, `class_=f"col-{self.size}"`) as well as in text. A slot
+that starts a URL attribute value is filled through `validate_url`. The
+contract for a slot field is that `render()` only interpolates it into strings
+and never branches on it or transforms it, and that it is a plain `str` field.
+Class creation rejects optional or non-string slots, and compiling a template
+raises `ValueError` when a marker comes back changed (upper-cased, sliced).
+Flush points from `Head` are kept as empty-named slots so `iter_html` still
+streams the head first. Compiled templates live in a dict that is dropped when
+it reaches `TEMPLATE_CACHE_SIZE` entries.
+"""
+
+import re
+from typing import ClassVar
+
+from pydantic import Field
+
+from colgandev.html.html_components import (
+    FLUSH,
+    URL_ATTRIBUTES,
+    Component,
+    HTMLFormat,
+    HTMLPart,
+    attribute_escapes,
+    iter_parts,
+    url_escapes,
+)
+
+TEMPLATE_CACHE_SIZE = 1024
+
+SLOT_PATTERN = re.compile("\x00([^\x00]*)\x00")
+
+URL_VALUE_START = re.compile(rf"(?:{'|'.join(map(re.escape, sorted(URL_ATTRIBUTES)))})=\"$")
+
+CHILDREN_SLOT = "children"
+
+
+def slot_marker(name: str) -> str:
+    return f"\x00{name}\x00"
+
+
+class ChildrenSlot(Component):
+    placements: list[tuple[HTMLFormat, int]] = Field(default_factory=list)
+
+    def html_parts(self, fmt: HTMLFormat, depth: int) -> list[HTMLPart]:
+        self.placements.append((fmt, depth))
+        return [slot_marker(CHILDREN_SLOT)]
+
+
+class Template:
+    def __init__(self, html: str, placements: list[tuple[HTMLFormat, int]]):
+        pieces = SLOT_PATTERN.split(html)
+        self.parts = tuple(pieces[0::2])
+        self.slots = tuple(pieces[1::2])
+        self.escapes = tuple(
+            url_escapes.escape if URL_VALUE_START.search(part) else attribute_escapes.escape for part in self.parts[:-1]
+        )
+        self.expanded = len(placements) > 1
+        self.children_format, self.children_depth = placements[0] if placements else (HTMLFormat.MINIFIED, 0)
+        self.children_separator = self.children_format.line_break(self.children_depth)
+
+
+templates: dict[tuple, Template] = {}
+
+
+class Templated(Component):
+    template_slots: ClassVar[tuple[str, ...]] = ()
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs):
+        super().__pydantic_init_subclass__(**kwargs)
+        for name in cls.template_slots:
+            if cls.model_fields[name].annotation is not str:
+                raise TypeError(f"{cls.__name__}.{name} must be a plain str field to be a template slot")
+
+    def template(self, fmt: HTMLFormat, depth: int) -> Template:
+        slots = self.template_slots
+        fixed = tuple(value for name, value in self.__dict__.items() if name not in slots and name != "children")
+        key = (type(self), fmt, depth, bool(self.children), fixed)
+        template = templates.get(key)
+        if template is None:
+            children_slot = ChildrenSlot()
+            update = {name: slot_marker(name) for name in slots}
+            update["children"] = [children_slot] if self.children else []
+            skeleton = self.model_copy(update=update)
+            chunks = iter_parts(Component.html_parts(skeleton, fmt, depth))
+            template = Template("".join(chunk or slot_marker("") for chunk in chunks), children_slot.placements)
+            unknown = set(template.slots) - {*slots, CHILDREN_SLOT, ""}
+            if unknown or any("\x00" in part for part in template.parts):
+                raise ValueError(
+                    f"{type(self).__name__}.render() must interpolate template slots unchanged, "
+                    f"found markers {sorted(unknown)} not in {slots}"
+                )
+            if len(templates) >= TEMPLATE_CACHE_SIZE:
+                templates.clear()
+            templates[key] = template
+        return template
+
+    def html_parts(self, fmt: HTMLFormat, depth: int) -> list[HTMLPart]:
+        values = self.__dict__
+        if not all(values[name] for name in self.template_slots):
+            return Component.html_parts(self, fmt, depth)
+        template = self.template(fmt, depth)
+        if template.expanded:
+            return Component.html_parts(self, fmt, depth)
+        parts: list[HTMLPart] = []
+        for part, name, escape in zip(template.parts, template.slots, template.escapes):
+            if part:
+                parts.append(part)
+            if name == CHILDREN_SLOT:
+                for index, child in enumerate(self.children):
+                    if index and template.children_separator:
+                        parts.append(template.children_separator)
+                    parts.append((child, template.children_format, template.children_depth))
+            elif name:
+                if value := escape(values[name]):
+                    parts.append(value)
+            else:
+                parts.append(FLUSH)
+        if template.parts[-1]:
+            parts.append(template.parts[-1])
+        return parts
@@ -1,3 +1,19 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent
+
+# Debug mode keeps full validation everywhere, e.g. it disables trusted component construction.
+DEBUG = os.environ.get("COLGANDEV_DEBUG", "0") == "1"
+
+# One of "pretty", "compact" or "minified"; see colgandev.html.html_components.HTMLFormat.
+HTML_FORMAT = os.environ.get("COLGANDEV_HTML_FORMAT", "pretty")
+
+# Total body bytes kept by the whole-page response cache before least recently used pages are evicted.
+PAGE_CACHE_MAX_BYTES = int(os.environ.get("COLGANDEV_PAGE_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+
+# Records per-route and per-component render metrics and serves them at /_/metrics; off costs nothing.
+RENDER_METRICS = os.environ.get("COLGANDEV_RENDER_METRICS", "0") == "1"
+
+# Resolves small /_/ embeds in rendered Markdown in-process and inlines them instead of loading each through HTMX.
+INLINE_EMBEDS = os.environ.get("COLGANDEV_INLINE_EMBEDS", "0") == "1"
@@ -3,7 +3,13 @@ Static site generator that crawls FastAPI endpoints and saves HTML files.
 
 This module provides functionality to generate a static version of the FastAPI
 application by starting a development server, crawling all GET routes, and
-saving the HTML responses to disk.
+saving the HTML responses to disk. Each page is also written precompressed
+(`index.html.gz`, `index.html.deflate`) so a static server can send the
+variant matching the client's Accept-Encoding without compressing on demand.
+Precompiled pages (see `precompile`) are not crawled: their HTML, its
+compressed variants, and `index.md` and `index.txt` (Markdown and plain text
+for feeds and search indexing) all come from one tree walk via
+`render_formats`.
 """
 
 import os
@@ -15,6 +21,40 @@ from urllib.parse import urljoin
 
 import requests
 
+VARIANT_SUFFIXES = {"gzip": ".gz", "deflate": ".deflate"}
+
+
+def page_directory(output_path: Path, url: str) -> Path:
+    clean_route = url.strip("/")
+    return output_path / clean_route if clean_route else output_path
+
+
+def write_html(file_path: Path, html: str):
+    from colgandev.html.page_cache import compressed_variants
+
+    file_path.write_text(html, encoding="utf-8")
+    for encoding, body in compressed_variants(html.encode()).items():
+        file_path.with_name(file_path.name + VARIANT_SUFFIXES[encoding]).write_bytes(body)
+
+
+def write_precompiled_pages(output_path: Path) -> set[str]:
+    from colgandev.html.formats import render_formats
+    from colgandev.html.page_cache import precompiled_pages
+
+    written = set()
+    for path, builder, params in precompiled_pages:
+        for kwargs in params:
+            url = path.format(**kwargs)
+            directory = page_directory(output_path, url)
+            directory.mkdir(parents=True, exist_ok=True)
+            rendered = render_formats(builder(**kwargs))
+            write_html(directory / "index.html", rendered.html)
+            (directory / "index.md").write_text(rendered.markdown, encoding="utf-8")
+            (directory / "index.txt").write_text(rendered.text + "\n", encoding="utf-8")
+            written.add(url)
+            print(f"  → {directory / 'index.html'}, {directory / 'index.md'}, {directory / 'index.txt'}")
+    return written
+
 
 def generate_site(output_dir: str = "./dist"):
     """Generate static site by crawling all FastAPI endpoints"""
@@ -42,6 +82,10 @@ def generate_site(output_dir: str = "./dist"):
                 if "GET" in route.methods:
                     routes.append(route.path)
 
+        print("Writing precompiled pages...")
+        precompiled = write_precompiled_pages(output_path)
+        routes = [route for route in routes if route not in precompiled]
+
         print(f"Found {len(routes)} routes to crawl:")
         for route in routes:
             print(f"  {route}")
@@ -69,8 +113,7 @@ def generate_site(output_dir: str = "./dist"):
                         file_path = output_path / "index.html"
 
                 # Write the HTML content
-                with open(file_path, "w", encoding="utf-8") as f:
-                    f.write(response.text)
+                write_html(file_path, response.text)
 
                 print(f"  → {file_path}")
 
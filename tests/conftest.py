@@ -0,0 +1,3 @@
+import os
+
+os.environ.setdefault("COLGANDEV_DEBUG", "1")
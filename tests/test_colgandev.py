@@ -1,7 +1,55 @@
+import array
+import asyncio
+import html
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from enum import StrEnum
+
 import pytest
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
+from pydantic import PrivateAttr, ValidationError
 
-from colgandev.app import app
+from colgandev.app import app, dotfiles_page, home_page
+from colgandev.benchmarks import find_regressions, load_baseline, run_benchmarks
+from colgandev.components import Alert, Badge, Card, Col, Container, Layout
+from colgandev.html import html_components, render_markdown
+from colgandev.html.async_render import AsyncComponent, resolve_async
+from colgandev.html.data_table import Column, DataTable
+from colgandev.html.diff import diff_oob
+from colgandev.html.embeds import EmbedCache, embed_cache, embed_resolver, embed_resolvers, in_flight, inline_embeds
+from colgandev.html.formats import render_formats
+from colgandev.html.html_components import (
+    A,
+    Button,
+    Component,
+    Div,
+    EscapeCache,
+    HTMLFormat,
+    Img,
+    Input,
+    Label,
+    Li,
+    Meta,
+    P,
+    Table,
+    Tbody,
+    Td,
+    Th,
+    Thead,
+    Tr,
+    Ul,
+    freeze,
+    stream_html,
+    trusted,
+)
+from colgandev.html.lazy import LazyCollection, LazyList, LazyTable
+from colgandev.html.metrics import exposition, instrument, uninstall
+from colgandev.html.page_cache import PageCache, compile_pages, page_cache, preferred_encoding
+from colgandev.html.static import FragmentCache, Static, fragment_cache
+from colgandev.html.templates import Templated
 
 
 @pytest.fixture
@@ -11,3 +59,629 @@ def client():
 
 def test_system_boots():
     assert True
+
+
+def test_pages_render(client):
+    for path in ["/", "/~/repos/colgandev"]:
+        response = client.get(path)
+        assert response.status_code == 200
+        assert response.text.lower().startswith("<!doctype html>")
+
+
+def test_attribute_plan_uses_aliases_and_kinds():
+    assert Label(for_="name", class_="form-label")("Name").render_html() == (
+        '<label class="form-label" for="name">Name</label>'
+    )
+    assert Button(type="button", disabled=True)("Go").render_html() == '<button type="button" disabled>Go</button>'
+    assert Input(name="q").render_html() == '<input name="q" />'
+
+
+def test_subclasses_render_base_attributes():
+    rendered = A(href="/x", style="color: red", title="T", data_testid="link")("x").render_html()
+    assert rendered == '<a style="color: red" title="T" data-testid="link" href="/x">x</a>'
+    assert Meta(charset="utf-8", id="m").render_html() == '<meta id="m" charset="utf-8" />'
+
+
+def test_url_attributes_are_validated():
+    assert A(href="javascript:alert(1)")("x").render_html() == '<a href="#">x</a>'
+    assert Img(src='/a"b.png', alt="<alt>").render_html() == '<img src="/a&quot;b.png" alt="&lt;alt&gt;" />'
+
+
+def test_stream_flushes_head_first():
+    page = Layout(page_title="T")(Container()(*(P()(f"paragraph {i}") for i in range(100))))
+    for fmt in HTMLFormat:
+        chunks = list(stream_html(page, fmt))
+        assert chunks[0].endswith("</head>")
+        assert "".join(chunks) == "".join(page.iter_html(fmt)) == page.render_html(fmt)
+
+
+def test_formats():
+    tree = Div(class_="a")(P()("x"), Component(tag="pre")("  keep\n  this"), Input())
+    assert tree.render_html(HTMLFormat.MINIFIED) == '<div class="a"><p>x</p><pre>  keep\n  this</pre><input /></div>'
+    assert tree.render_html(HTMLFormat.COMPACT) == (
+        '<div class="a">\n<p>\nx\n</p>\n<pre>  keep\n  this</pre>\n<input />\n</div>'
+    )
+    assert tree.render_html(HTMLFormat.PRETTY) == (
+        '<div class="a">\n  <p>\n    x\n  </p>\n  <pre>  keep\n  this</pre>\n  <input />\n</div>'
+    )
+
+
+def test_static_fragments_are_cached(monkeypatch):
+    fragment_cache.clear()
+
+    def build():
+        return Div(class_="outer")(Static()(Badge(variant="info")("constant"), P()("text")))
+
+    expected = build().render_html(HTMLFormat.PRETTY)
+    assert build().render_html(HTMLFormat.PRETTY) == expected
+    assert len(fragment_cache) == 1
+    assert build().render_html(HTMLFormat.PRETTY) == expected
+    assert len(fragment_cache) == 1
+    assert (
+        Div(class_="outer")(Badge(variant="info")("constant"), P()("text")).render_html(HTMLFormat.PRETTY) == expected
+    )
+    assert Div()(Div(), Div()).structural_key() != Div()(Div()(Div())).structural_key()
+
+    deep = Div()("bottom")
+    for _ in range(5000):
+        deep = Div()(deep)
+    assert Static()(deep).render_html() == Static()(deep).render_html() == deep.render_html()
+
+    pages = [builder().render_html() for builder in (home_page, dotfiles_page)]
+    monkeypatch.setattr(Component, "structural_key", lambda self: pytest.fail("static body was walked"))
+    assert [builder().render_html() for builder in (home_page, dotfiles_page)] == pages
+
+
+def test_fragment_cache_is_bounded():
+    cache = FragmentCache(maxsize=2)
+    for key in "abc":
+        cache.set((key,), key)
+    assert len(cache) == 2
+    assert cache.get(("a",)) is None
+    assert cache.get(("c",)) == "c"
+
+
+def test_trusted_construction(monkeypatch):
+    def build():
+        return Layout(page_title="T")(Div(class_="a", data_testid="x")(Badge(variant="info")("b"), Input(), "c"))
+
+    with trusted():
+        with pytest.raises(ValidationError):
+            Div(class_=1)
+
+    monkeypatch.setattr(html_components, "DEBUG", False)
+    with trusted():
+        fast = build()
+        Div(class_=1)
+    assert fast.model_fields_set == {"page_title"}
+    assert fast.render_html(HTMLFormat.PRETTY) == build().render_html(HTMLFormat.PRETTY)
+
+    class Variant(StrEnum):
+        WIDE = "trusted-wide & tall"
+
+    with trusted():
+        kept = Div(class_=Variant.WIDE)(Variant.WIDE)
+    assert type(kept.class_) is Variant
+    assert kept.render_html() == '<div class="trusted-wide &amp; tall">trusted-wide &amp; tall</div>'
+    assert P()(Variant.WIDE).model_copy(update={"id": Variant.WIDE}).render_html() == (
+        '<p id="trusted-wide &amp; tall">trusted-wide &amp; tall</p>'
+    )
+
+
+def test_page_cache_etag_and_304(client):
+    page_cache.clear()
+    first = client.get("/~/repos/colgandev")
+    etag = first.headers["etag"]
+    assert len(page_cache) == 1
+    second = client.get("/~/repos/colgandev")
+    assert second.content == first.content
+    assert second.headers["etag"] == etag
+    revalidated = client.get("/~/repos/colgandev", headers={"If-None-Match": f'W/"other", {etag}'})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    streamed = client.get("/", headers={"Accept-Encoding": "identity"})
+    assert "etag" not in streamed.headers and streamed.text.startswith("<!doctype html>")
+    cached = client.get("/", headers={"Accept-Encoding": "identity"})
+    assert cached.content == streamed.content == page_cache.get(("/", "")).body
+    revalidate = {"Accept-Encoding": "identity", "If-None-Match": cached.headers["etag"]}
+    assert client.get("/", headers=revalidate).status_code == 304
+
+
+def test_page_cache_byte_budget():
+    cache = PageCache(max_bytes=10)
+    cache.store(("a",), b"12345", "text/html")
+    cache.store(("b",), b"12345", "text/html")
+    cache.get(("a",))
+    cache.store(("c",), b"123", "text/html")
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) is not None
+    assert cache.size == 8
+    cache.store(("huge",), b"x" * 11, "text/html")
+    assert cache.get(("huge",)) is None
+
+
+def test_escape_cache():
+    cache = EscapeCache(html.escape, maxsize=2, max_length=8)
+    assert cache.escape("a&b") == "a&amp;b"
+    assert cache.escape("a&b") == "a&amp;b"
+    assert cache.escape("<too long>") == "&lt;too long&gt;"
+    cache.escape("c")
+    cache.escape("d")
+    assert list(cache.entries) == ["c", "d"]
+    assert cache.stats() == {"hits": 1, "misses": 4, "hit_rate": 0.2, "size": 2}
+
+    shared = EscapeCache(html.escape, maxsize=64)
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda n: [shared.escape(f"<{n}-{i}>") for i in range(5000)], range(8)))
+    assert results[3][42] == "&lt;3-42&gt;" and len(shared.entries) == 64
+    with ThreadPoolExecutor(2) as pool:
+        escaping = pool.submit(lambda: [shared.escape(f"[{i}]") for i in range(20000)])
+        for _ in range(2000):
+            shared.clear()
+        assert escaping.result()[-1] == "[19999]"
+
+
+def test_diff_emits_oob_fragments_for_changed_subtrees():
+    def page(count, items):
+        return Layout()(
+            Container()(Div(id="count")(f"count {count}"), Card()(Ul(id="items")(*(Li()(item) for item in items))))
+        )
+
+    assert diff_oob(page(1, ["a"]), page(1, ["a"])) == ""
+    assert diff_oob(page(1, ["a"]), page(2, ["a"])) == '<div id="count" hx-swap-oob="true">count 2</div>'
+    assert diff_oob(page(1, ["a"]), page(1, ["b", "c"])) == (
+        '<ul id="items" hx-swap-oob="true"><li>b</li><li>c</li></ul>'
+    )
+    assert diff_oob(Div()("x"), Div()("y")) is None
+
+    def nested(text):
+        node = Div(id="leaf")(text)
+        for _ in range(5000):
+            node = Div()(node)
+        return Div(id="root")(node, P()("same"))
+
+    assert diff_oob(nested("a"), nested("b")) == '<div id="leaf" hx-swap-oob="true">b</div>'
+    assert diff_oob(nested("a"), nested("a")) == ""
+
+
+@pytest.mark.skipif(os.environ.get("COLGANDEV_BENCHMARKS") != "1", reason="set COLGANDEV_BENCHMARKS=1 to run")
+def test_render_benchmarks():
+    regressions = find_regressions(run_benchmarks(), load_baseline())
+    assert not regressions, "\n".join(regressions)
+
+
+def test_precompiled_pages_are_served_without_rendering(client, monkeypatch):
+    page_cache.clear()
+    assert set(compile_pages()) == {"/", "/~/repos/colgandev"}
+
+    def unavailable(self, fmt, depth):
+        raise AssertionError(f"{type(self).__name__} was rendered")
+
+    monkeypatch.setattr(Component, "html_parts", unavailable)
+    response = client.get("/~/repos/colgandev")
+    assert response.status_code == 200
+    assert response.content == page_cache.get(("/~/repos/colgandev", "")).body
+
+
+def test_templated_components_match_plain_rendering(monkeypatch):
+    page = Layout(page_title="<T>", description='"d"')(
+        Container()(Col(size="md-6")(Card()(Alert(variant="info")("a"), P()("b")), A(href="/x")("c")), Col()())
+    )
+    expected = {fmt: (page.render_html(fmt), list(stream_html(page, fmt))) for fmt in HTMLFormat}
+
+    monkeypatch.setattr(Templated, "html_parts", Component.html_parts)
+    for fmt in HTMLFormat:
+        assert expected[fmt] == (page.render_html(fmt), list(stream_html(page, fmt)))
+
+
+class Twice(Templated):
+    template_slots = ("label",)
+    label: str = ""
+
+    def render(self):
+        return Div(class_=self.label)(Div()(*self.children), Ul()(Li()(*self.children)))
+
+
+class Shouting(Templated):
+    template_slots = ("label",)
+    label: str = ""
+
+    def render(self):
+        return Div(class_=self.label.upper())(*self.children)
+
+
+def test_templated_children_follow_their_placement(monkeypatch):
+    pages = [
+        Component(tag="pre")(Div()(Card()(P()("a"), "b"), Col(size="md-6")(Alert(variant="info")("c")))),
+        Div()(Twice(label="x")(P()("a"), "b")),
+        Layout(page_title="T", description="")(Col(size="")(P()("a"))),
+    ]
+    expected = [[page.render_html(fmt) for fmt in HTMLFormat] for page in pages]
+
+    monkeypatch.setattr(Templated, "html_parts", Component.html_parts)
+    assert expected == [[page.render_html(fmt) for fmt in HTMLFormat] for page in pages]
+    assert "\n" not in expected[0][0].partition("<pre>")[2]
+
+
+def test_transformed_template_slots_are_rejected():
+    with pytest.raises(ValueError, match="Shouting"):
+        Shouting(label="x")("a").render_html()
+
+
+def test_template_slots_must_be_plain_strings():
+    with pytest.raises(TypeError):
+
+        class Broken(Templated):
+            template_slots = ("label",)
+            label: str | None = None
+
+
+def test_cached_pages_serve_precompressed_variants(client):
+    page_cache.clear()
+    plain = client.get("/~/repos/colgandev", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["vary"] == "Accept-Encoding"
+
+    compressed = client.get("/~/repos/colgandev", headers={"Accept-Encoding": "gzip;q=0.5, deflate"})
+    assert compressed.headers["content-encoding"] == "deflate"
+    assert compressed.content == plain.content
+    assert compressed.headers["etag"] != plain.headers["etag"]
+
+    revalidated = client.get(
+        "/~/repos/colgandev", headers={"Accept-Encoding": "gzip", "If-None-Match": plain.headers["etag"]}
+    )
+    assert revalidated.status_code == 200
+    assert revalidated.headers["content-encoding"] == "gzip"
+
+
+def test_preferred_encoding():
+    assert preferred_encoding("gzip, deflate, br", ["gzip", "deflate"]) == "gzip"
+    assert preferred_encoding("br, *;q=0.1", ["gzip", "deflate"]) == "gzip"
+    assert preferred_encoding("gzip;q=0, deflate;q=0", ["gzip", "deflate"]) is None
+    assert preferred_encoding(None, ["gzip"]) is None
+
+
+class SlowCard(AsyncComponent):
+    delay: float = 0.1
+    label: str = "loaded"
+
+    async def render(self) -> Component:
+        await asyncio.sleep(self.delay)
+        if self.delay < 0:
+            raise ValueError("broken card")
+        return P()(self.label)
+
+    def fallback(self) -> Component:
+        return P()("unavailable")
+
+
+def test_async_components_resolve_concurrently():
+    tree = Div()(*(SlowCard(label=f"card {index}") for index in range(5)), SlowCard(timeout=0.01), SlowCard(delay=-1))
+    start = time.perf_counter()
+    resolved = asyncio.run(resolve_async(tree))
+    assert time.perf_counter() - start < 0.4
+    cards = "".join(f"<p>card {index}</p>" for index in range(5))
+    assert resolved.render_html() == f"<div>{cards}<p>unavailable</p><p>unavailable</p></div>"
+
+    with pytest.raises(RuntimeError):
+        Div()(SlowCard()).render_html()
+    with pytest.raises(TypeError):
+        AsyncComponent()
+
+    shared = freeze(Div()(Ul()(Li()(SlowCard(delay=0, label="frozen"))), P()("static")))
+    before = shared.structural_key()
+    resolved = asyncio.run(resolve_async(shared))
+    assert resolved.render_html() == "<div><ul><li><p>frozen</p></li></ul><p>static</p></div>"
+    assert shared.structural_key() == before and resolved.children[1] is shared.children[1]
+
+
+def test_render_handles_deep_and_large_trees():
+    node = P()("leaf")
+    for _ in range(50_000):
+        node = Div()(node)
+    expected = "<div>" * 50_000 + "<p>leaf</p>" + "</div>" * 50_000
+    assert node.render_html() == expected
+    assert "".join(node.iter_html()) == expected
+
+    row = Ul()(*[Li()("x")] * 1000)
+    page = Div()(*[row] * 1000)
+    assert page.render_html() == "<div>" + ("<ul>" + "<li>x</li>" * 1000 + "</ul>") * 1000 + "</div>"
+
+
+def test_data_table_matches_element_table():
+    names = ["Ann & Bob", "<script>", "Cy"]
+    counts = array.array("i", [1200, 5, 42])
+    table = DataTable(
+        class_="table",
+        columns=(
+            Column("Name", names),
+            Column("Count", counts, format="{:,}".format, escape=None, class_="text-end"),
+        ),
+    )
+    elements = Table(class_="table")(
+        Thead()(Tr()(Th()("Name"), Th(class_="text-end")("Count"))),
+        Tbody()(*(Tr()(Td()(name), Td(class_="text-end")(f"{count:,}")) for name, count in zip(names, counts))),
+    )
+    for fmt in HTMLFormat:
+        assert table.render_html(fmt, 1) == elements.render_html(fmt, 1)
+    assert "&lt;script&gt;" in table.render_html()
+    assert (
+        DataTable(columns=(Column("Empty", []),)).render_html()
+        == Table()(Thead()(Tr()(Th()("Empty"))), Tbody()).render_html()
+    )
+
+    with pytest.raises(ValueError):
+        DataTable(columns=(Column("A", [1, 2]), Column("B", [1]))).render_html()
+
+
+def numbers(offset: int, limit: int) -> list[int]:
+    return list(range(offset, min(offset + limit, 120)))
+
+
+def squares(offset: int, limit: int) -> list[tuple[int, int]]:
+    return [(n, n * n) for n in numbers(offset, limit)]
+
+
+def test_lazy_collections_load_pages_through_htmx(client):
+    first = LazyList(source=numbers).render_html()
+    assert first.count("<li>") == 50
+    assert 'hx-trigger="revealed"' in first
+
+    next_url = html.unescape(first.split('hx-get="')[1].split('"')[0])
+    second = client.get(next_url).text
+    assert "<li>50</li>" in "".join(second.split()) and second.count("<li>") == 50
+    third = client.get(html.unescape(second.split('hx-get="')[1].split('"')[0])).text
+    assert third.count("<li>") == 20 and "hx-get" not in third
+
+    table = LazyTable(source=((row, row * row) for row in range(3)), headers=("n", "n²"), page_size=2).render_html()
+    assert "<tbody><tr><td>0</td><td>0</td></tr><tr><td>1</td><td>1</td></tr><tr hx-get=" in table
+    rest_url = html.unescape(table.split('hx-get="')[1].split('"')[0])
+    rest = client.get(rest_url).text
+    assert "<td>4</td>" in "".join(rest.split()) and "hx-get" not in rest
+    assert client.get(rest_url).text == rest
+    assert client.get(rest_url.replace("offset=2", "offset=-5")).status_code == 422
+    assert client.get("/_/lazy/unknown").status_code == 404
+    with pytest.raises(TypeError):
+        LazyCollection(source=numbers)
+
+    squared = LazyTable(source=squares, page_size=3).render_html()
+    assert LazyList(source=squares, page_size=10).render_html().count("<li>") == 10
+    rows = client.get(html.unescape(squared.split('hx-get="')[1].split('"')[0])).text
+    assert "<td>9</td>" in "".join(rows.split()) and "<li>" not in rows and rows.count("<tr>") == 3
+
+
+def test_frozen_nodes_are_immutable_and_shared():
+    nav = freeze(Ul(class_="nav")(Li()("Home"), Li()("About")))
+    assert nav is freeze(Ul(class_="nav")(Li()("Home"), Li()("About")))
+    assert nav.children[0] is freeze(Li()("Home"))
+    assert hash(nav) == hash(freeze(Ul(class_="nav")(Li()("Home"), Li()("About"))))
+    assert {nav: "cached"}[nav] == "cached"
+
+    extended = nav(Li()("Blog"))
+    assert extended is not nav and len(nav.children) == 2 and len(extended.children) == 3
+    assert extended is freeze(Ul(class_="nav")(Li()("Home"), Li()("About"), Li()("Blog")))
+    with pytest.raises(TypeError):
+        nav.class_ = "other"
+    with pytest.raises(TypeError):
+        hash(Li()("mutable"))
+
+    page = Div()(nav, P()("body"))
+    assert page.render_html() == '<div><ul class="nav"><li>Home</li><li>About</li></ul><p>body</p></div>'
+    copy = nav.model_copy(update={"class_": "tabs"})
+    copy(Li()("More"))
+    assert copy.render_html().count("<li>") == 3 and len(nav.children) == 2
+
+    class Widget(Div):
+        _state: int = PrivateAttr(0)
+
+    widget = Widget()(P()("x"))
+    widget.id = "a"
+    assert widget.render_html() == '<div id="a"><p>x</p></div>'
+    with pytest.raises(TypeError):
+        hash(widget)
+    frozen_widget = freeze(widget)
+    assert frozen_widget._state == 0 and hash(frozen_widget) == hash(freeze(Widget(id="a")(P()("x"))))
+    assert frozen_widget.model_copy()._state == 0
+
+    leaf = Div()
+    for _ in range(5000):
+        leaf = Div()(leaf)
+    assert freeze(leaf).render_html().count("<div>") == 5001
+
+
+def test_render_metrics_are_exposed_when_enabled():
+    html_parts = Div.html_parts
+    instrument(FastAPI(), enabled=False)
+    assert Div.html_parts is html_parts
+
+    metrics_app = FastAPI()
+    instrument(metrics_app, enabled=True)
+    try:
+
+        @metrics_app.get("/cards/{name}")
+        async def cards(name: str):
+            return html_components.render(Card()(P()(name)))
+
+        metrics_client = TestClient(metrics_app)
+        card = metrics_client.get("/cards/é")
+        assert card.status_code == 200
+        body = metrics_client.get("/_/metrics").text
+    finally:
+        uninstall()
+
+    assert Div.html_parts is html_parts
+    assert 'colgandev_route_render_seconds_count{route="/cards/{name}"} 1' in body
+    assert 'colgandev_component_rendered_total{component="Card"}' in body
+    assert 'colgandev_component_rendered_total{component="P"} 1' in body
+    assert 'colgandev_component_output_bytes_total{component="P"}' in body
+    assert f'colgandev_route_output_bytes_total{{route="/cards/{{name}}"}} {len(card.content)}' in body
+    assert "# TYPE colgandev_route_construct_seconds histogram" in exposition()
+
+
+def test_formats_render_in_one_walk():
+    for builder in (home_page, dotfiles_page):
+        for fmt in HTMLFormat:
+            assert render_formats(builder(), fmt).html == builder().render_html(fmt)
+
+    tree = Div()(
+        Component(tag="h2")("Title *x*"),
+        P()("See ", A(href="/a")("docs"), " and ", Component(tag="code")("x_y"), "."),
+        Ul()(Li()("one"), Li()("two", Ul()(Li()("nested")))),
+        Component(tag="pre")("def f():\n    return 1"),
+        Component(tag="blockquote")(P()("quoted")),
+        Table()(Thead()(Tr()(Th()("A"), Th()("B|c"))), Tbody()(Tr()(Td()("1"), Td()("2")))),
+        Img(src="/i.png", alt="pic"),
+    )
+    rendered = render_formats(tree, HTMLFormat.MINIFIED)
+    assert rendered.html == tree.render_html(HTMLFormat.MINIFIED)
+    assert rendered.markdown == (
+        "## Title \\*x\\*\n\nSee [docs](/a) and `x_y`.\n\n- one\n- two\n    - nested\n\n"
+        "```\ndef f():\n    return 1\n```\n\n> quoted\n\n| A | B\\|c |\n| --- | --- |\n| 1 | 2 |\n\n![pic](/i.png)\n"
+    )
+    assert (
+        rendered.text == "Title *x*\nSee docs and x_y.\none\ntwo\nnested\ndef f():\nreturn 1\nquoted\nA B|c\n1 2\npic"
+    )
+    assert tree.render_markdown() == rendered.markdown
+    assert render_formats(tree, HTMLFormat.PRETTY).markdown == rendered.markdown
+
+    buttons = Div()(A(href="/a")("one"), Button()("two"), Button()("three"))
+    assert render_formats(buttons, HTMLFormat.PRETTY).text == "one two three"
+    assert render_formats(buttons, HTMLFormat.COMPACT).markdown == "[one](/a) two three\n"
+    assert render_formats(buttons, HTMLFormat.MINIFIED).text == "onetwothree"
+
+
+def test_markdown_conversions_are_cached_and_thread_local(monkeypatch):
+    render_markdown.markdown_cache.clear()
+    linked = render_markdown.convert("[a][1]\n\n[1]: https://example.com")
+    assert 'href="https://example.com"' in linked and 'target="_blank"' in linked
+    assert "href" not in render_markdown.convert("[a][1]")
+
+    monkeypatch.setattr(render_markdown, "thread_markdown", lambda: pytest.fail("cache miss"))
+    assert render_markdown.convert("[a][1]\n\n[1]: https://example.com") == linked
+    monkeypatch.undo()
+
+    bodies = [f"# Note {n}\n\n/_/asset/{n}\n\n```py\nx = {n}\n```" for n in range(200)]
+    with ThreadPoolExecutor(8) as pool:
+        converted = list(pool.map(render_markdown.convert, bodies))
+    render_markdown.markdown_cache.clear()
+    assert converted == [render_markdown.build_markdown().convert(body) for body in bodies]
+
+
+def test_long_markdown_re_renders_only_changed_blocks(monkeypatch):
+    sections = [
+        f"## Section {n}\n\nSee [the docs][docs] and `x`.\n\n- one\n\n- two\n\n    more\n\n> quote\n\n> more\n\n"
+        f"```py\nx = {n}\n\n[docs]: /not-a-reference\n```"
+        for n in range(300)
+    ]
+    note = "\n\n".join(sections) + "\n\n[docs]: https://example.com/docs"
+    assert len(note) >= render_markdown.INCREMENTAL_MARKDOWN_SIZE
+    blocks, references = render_markdown.markdown_blocks(note)
+    assert len(blocks) == 5 * 300 and references == {"docs": ("https://example.com/docs", None)}
+
+    render_markdown.markdown_cache.clear()
+    render_markdown.block_cache.clear()
+    assert render_markdown.convert(note) == render_markdown.convert_text(note)
+
+    converted = []
+    convert_text = render_markdown.convert_text
+    monkeypatch.setattr(
+        render_markdown, "convert_text", lambda text, refs=None: converted.append(text) or convert_text(text, refs)
+    )
+    edited = note.replace("## Section 150", "## Section 150, edited")
+    assert render_markdown.convert(edited) == convert_text(edited)
+    assert converted == ["## Section 150, edited"]
+    assert render_markdown.markdown_blocks(note + "\n\n<div>\n\nraw\n\n</div>") is None
+
+    nested = "- a\n\n  - x\n\n[r]: https://e.com\n\n- b\n"
+    assert render_markdown.convert_blocks(*render_markdown.markdown_blocks(nested)) == convert_text(nested)
+
+
+def test_convert_many_preserves_order_across_worker_processes(monkeypatch):
+    notes = [f"# Note {n % 12}\n\n/_/asset/{n % 12}\n\nhttps://youtu.be/v{n % 12}" for n in range(30)]
+    render_markdown.markdown_cache.clear()
+    monkeypatch.setattr(render_markdown, "BATCH_POOL_THRESHOLD", 1)
+    converted = render_markdown.convert_many(notes, workers=2, chunksize=4)
+    assert converted == [render_markdown.convert_text(note) for note in notes]
+    assert len(render_markdown.markdown_cache) == 12
+    pool = render_markdown.batch_pool
+    render_markdown.markdown_cache.clear()
+    assert render_markdown.convert_many(notes, workers=2, chunksize=4) == converted
+    assert render_markdown.batch_pool is pool is not None
+
+    monkeypatch.setattr(render_markdown, "convert_text", lambda *args: pytest.fail("cache miss"))
+    assert render_markdown.convert_many(reversed(notes)) == converted[::-1]
+
+
+def test_url_embeds_dispatch_through_the_provider_registry():
+    preprocessor = render_markdown.URLEmbedPreprocessor(None)
+    prose = ["Some prose.", "", "https://example.com/page"]
+    assert preprocessor.run(prose) is prose
+
+    embedded = preprocessor.run(
+        ["  https://youtu.be/abc_1?t=3 ", "/_/notes/1", "see /_/notes/1", "https://example.com"]
+    )
+    assert 'src="https://www.youtube.com/embed/abc_1"' in embedded[0]
+    assert embedded[1:] == [
+        '<div hx-get="/_/notes/1" hx-trigger="revealed"></div>',
+        "see /_/notes/1",
+        "https://example.com",
+    ]
+
+    render_markdown.register_embed("gist", "gist.github.com", r"https://gist\.github\.com/\S+")(
+        lambda url: f'<script src="{url}.js"></script>'
+    )
+    try:
+        assert preprocessor.run(["https://gist.github.com/a/1"]) == [
+            '<script src="https://gist.github.com/a/1.js"></script>'
+        ]
+    finally:
+        del render_markdown.embed_providers["gist"]
+        render_markdown.embed_pattern.cache_clear()
+
+
+def test_small_embeds_are_inlined_and_slow_or_large_ones_stay_lazy(monkeypatch):
+    release = threading.Event()
+
+    @embed_resolver("/_/test-embeds/")
+    def fragments(url):
+        match url.removeprefix("/_/test-embeds/"):
+            case "small?x=1&y=2":
+                return "<b>small</b>"
+            case "large":
+                return "x" * 100_000
+            case "slow":
+                release.wait(5)
+                return "<i>slow</i>"
+
+    embed_cache.clear()
+    note = (
+        "/_/test-embeds/small?x=1&y=2\n\n/_/test-embeds/large\n\n/_/test-embeds/slow\n\n/_/other\n\n/_/test-embeds/none"
+    )
+    try:
+        monkeypatch.setattr(render_markdown, "INLINE_EMBEDS", True)
+        rendered = str(render_markdown.render_markdown(note))
+        assert "<div><b>small</b></div>" in rendered
+        for lazy in ("large", "slow", "none"):
+            assert f'<div hx-get="/_/test-embeds/{lazy}" hx-trigger="revealed"></div>' in rendered
+        assert '<div hx-get="/_/other" hx-trigger="revealed"></div>' in rendered
+
+        slow = in_flight["/_/test-embeds/slow"]
+        release.set()
+        slow.result()
+        assert "<div><i>slow</i></div>" in inline_embeds(render_markdown.convert(note))
+        assert embed_cache.get("/_/test-embeds/large").html is None
+    finally:
+        del embed_resolvers["/_/test-embeds/"]
+        embed_cache.clear()
+
+    expiring = EmbedCache(ttl=0)
+    expiring.store("/_/a", "<p>a</p>")
+    assert expiring.get("/_/a") is None and len(expiring) == 0
+    bounded = EmbedCache(max_bytes=10)
+    bounded.store("/_/a", "12345")
+    bounded.store("/_/b", "123456")
+    assert bounded.get("/_/a") is None and bounded.get("/_/b").html == "123456" and bounded.size == 6
+    lazy = EmbedCache(max_entries=3)
+    for n in range(100):
+        lazy.store(f"/_/missing/{n}", None)
+    assert len(lazy) == 3 and lazy.get("/_/missing/99") is not None and lazy.get("/_/missing/0") is None